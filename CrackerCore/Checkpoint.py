@@ -0,0 +1,90 @@
+from __future__ import annotations
+import base64
+import json
+import logging
+import os
+from pathlib import Path
+from threading import Event, Thread
+from typing import Dict, List, Tuple
+
+from CrackerCore.HashGroup import HashGroup
+from CrackerCore.Hasher import Hasher
+from CrackerCore.sources.Source import Source
+
+
+class Checkpoint:
+    __version = 1
+    # The parts of the configuration that define the job, a resumed run takes them from the checkpoint
+    job_keys = ('dict', 'pipeline', 'selected_hash_sets', 'hash_sets')
+
+    def __init__(self, path: Path, config: Dict, word_source: Source, hasher: Hasher, interval: float = 60) -> None:
+        # The checkpoint is rewritten by a background thread, the workers only flag the grains they complete
+        self.__path = path
+        self.__job = {key: config[key] for key in Checkpoint.job_keys}
+        self.__word_source = word_source
+        self.__hasher = hasher
+        self.__interval = interval
+        self.__stop = Event()
+        self.__thread = Thread(name='Checkpoint', target=self.__run, daemon=True)
+
+    @staticmethod
+    def __encode(value):
+        if isinstance(value, bytes):
+            return {'$bytes': base64.b64encode(value).decode('ascii')}
+        raise TypeError(f'Cannot store {type(value).__name__} in a checkpoint')
+
+    @staticmethod
+    def __decode(value: Dict):
+        return base64.b64decode(value['$bytes']) if set(value) == {'$bytes'} else value
+
+    @staticmethod
+    def load(path: Path) -> Dict:
+        with path.open('r') as checkpoint_file:
+            checkpoint = json.load(checkpoint_file, object_hook=Checkpoint.__decode)
+        if checkpoint.get('version') != Checkpoint.__version:
+            raise ValueError(f'{path} is not a supported checkpoint')
+        return checkpoint
+
+    @staticmethod
+    def restore(checkpoint: Dict, word_source: Source, groups: List[HashGroup]) -> Tuple[bool, int]:
+        # Register the matches of the checkpoint and continue the word source from where it was,
+        # returns whether the source could be resumed and how many matches were restored
+        restored = 0
+        for group in groups:
+            for word, label in checkpoint['matches'].get(group.title, ()):
+                restored += group.add_known(word.encode('utf8'), bytes.fromhex(label.rsplit(':', 1)[-1]))
+        resumed = checkpoint['source'] is not None and word_source.restore(checkpoint['source'])
+        return resumed, restored
+
+    def __run(self) -> None:
+        while not self.__stop.wait(self.__interval):
+            self.write()
+
+    def write(self) -> None:
+        # Capture the source state before the matches so that no match of a completed grain is missed,
+        # the matches that worker processes reported before completing their grains may still be queued
+        checkpoint = {'version': Checkpoint.__version, 'config': self.__job, 'source': self.__word_source.checkpoint()}
+        self.__hasher.settle()
+        checkpoint['matches'] = self.__hasher.matches()
+        temp_path = self.__path.with_name(self.__path.name + '.tmp')
+        try:
+            with temp_path.open('w') as checkpoint_file:
+                json.dump(checkpoint, checkpoint_file, default=Checkpoint.__encode)
+            os.replace(temp_path, self.__path)
+        except OSError as error:
+            logging.warning(f'Could not write the checkpoint {self.__path}: {error}')
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self, completed: bool) -> None:
+        # A completed job leaves no checkpoint behind, otherwise the final state is written
+        self.__stop.set()
+        if self.__thread.is_alive():
+            self.__thread.join()
+        if completed:
+            if self.__path.exists():
+                self.__path.unlink()
+        else:
+            self.write()
+            logging.info(f'Stored a checkpoint in {self.__path}, continue with --resume {self.__path}')
@@ -0,0 +1,172 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import socket
+import socketserver
+from multiprocessing import RawValue
+from pathlib import Path
+from threading import Event, Lock, Thread, local
+from typing import Dict, List, Optional, Set, Tuple
+
+from CrackerCore.utilities.claim import RangeClaimer
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    host, _, port = address.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+class Coordinator:
+    # Hands the grains of one dictionary out to the nodes over TCP and collects their matches, the messages are
+    # JSON lines: hello with the size and the grain of the keyspace, claim, complete and match
+    def __init__(self, address: Tuple[str, int], output: Path) -> None:
+        self.__claimer: Optional[RangeClaimer] = None
+        self.__keyspace: Optional[Tuple[int, int]] = None
+        self.__lock = Lock()
+        # Ranges that were claimed by a node which disconnected before completing them
+        self.__returned: List[Tuple[int, int]] = []
+        self.__outstanding: Dict[int, Set[Tuple[int, int]]] = {}
+        self.__output = output
+        self.__done = Event()
+        self.__server = socketserver.ThreadingTCPServer(address, self.__handler(), bind_and_activate=True)
+        self.__server.daemon_threads = True
+
+    def __handler(self):
+        coordinator = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self) -> None:
+                coordinator.serve(id(self), self.rfile, self.wfile)
+        return Handler
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.__server.server_address
+
+    def serve(self, node: int, reader, writer) -> None:
+        # Answer the requests of a node until it disconnects, its unfinished ranges are handed out again
+        with self.__lock:
+            self.__outstanding[node] = set()
+        try:
+            for line in reader:
+                request = json.loads(line)
+                writer.write(json.dumps(self.__answer(node, request)).encode('utf8') + b'\n')
+                writer.flush()
+        except (OSError, ValueError) as error:
+            logging.warning(f'Lost a node: {error}')
+        finally:
+            with self.__lock:
+                self.__returned.extend(self.__outstanding.pop(node))
+            self.__check_done()
+
+    def __answer(self, node: int, request: Dict) -> Dict:
+        if request['op'] == 'hello':
+            keyspace = (request['total'], request['grain'])
+            with self.__lock:
+                if self.__keyspace is None:
+                    self.__keyspace = keyspace
+                    self.__claimer = RangeClaimer(*keyspace)
+                    logging.info(f'Coordinating a keyspace of {keyspace[0]} in grains of {keyspace[1]}')
+            if keyspace != self.__keyspace:
+                return {'error': f'The keyspace {keyspace} differs from the coordinated {self.__keyspace}'}
+            return {'ok': True}
+
+        if request['op'] == 'claim':
+            with self.__lock:
+                if self.__returned:
+                    ranges = [self.__returned.pop()]
+                else:
+                    ranges = self.__claimer.claim(request['units'])
+                self.__outstanding[node].update(ranges)
+            return {'ranges': ranges}
+
+        if request['op'] == 'complete':
+            with self.__lock:
+                self.__outstanding[node].difference_update(tuple(r) for r in request['ranges'])
+            return {'ok': True}
+
+        if request['op'] == 'match':
+            logging.info(f'A match was registered in {request["title"]}: {request["word"]} - {request["hash"]}')
+            with self.__lock, self.__output.open('a') as output:
+                output.write(f'{request["title"]}\t{request["word"]}\t{request["hash"]}\n')
+            return {'ok': True}
+
+        return {'error': f'Unknown request {request["op"]}'}
+
+    def __check_done(self) -> None:
+        # The job is done once every grain has been completed and the nodes have disconnected, so that the
+        # matches they register after completing their last ranges still arrive
+        with self.__lock:
+            if self.__claimer is not None and self.__claimer.exhausted and not self.__returned and not self.__outstanding:
+                self.__done.set()
+
+    def run(self) -> None:
+        # Serve the nodes until the whole keyspace has been completed
+        with self.__server:
+            Thread(name='Server', target=self.__server.serve_forever, daemon=True).start()
+            self.__done.wait()
+            self.__server.shutdown()
+        logging.info(f'The keyspace has been completed, the matches are in {self.__output}')
+
+
+class RemoteClaimer:
+    # Claims the grains from a coordinator, each thread and each forked process talks over a connection of its own
+    def __init__(self, address: Tuple[str, int]) -> None:
+        self.__address = address
+        self.__keyspace: Optional[Tuple[int, int]] = None
+        self.__local = local()
+        self.__exhausted = RawValue('b', 0)
+
+    def attach(self, total: int, grain: int) -> RemoteClaimer:
+        # Claim a keyspace of the given size and grain, the coordinator refuses one that differs from the others
+        self.__keyspace = (total, grain)
+        self.__connection()
+        return self
+
+    @staticmethod
+    def __send(connection, request: Dict) -> Dict:
+        _, sock, reader = connection
+        sock.sendall(json.dumps(request).encode('utf8') + b'\n')
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('The coordinator closed the connection')
+        answer = json.loads(line)
+        if 'error' in answer:
+            raise ConnectionError(answer['error'])
+        return answer
+
+    def __connection(self):
+        connection = getattr(self.__local, 'connection', None)
+        if connection is None or connection[0] != os.getpid():
+            sock = socket.create_connection(self.__address)
+            connection = (os.getpid(), sock, sock.makefile('rb'))
+            RemoteClaimer.__send(connection, {'op': 'hello', 'total': self.__keyspace[0], 'grain': self.__keyspace[1]})
+            self.__local.connection = connection
+        return connection
+
+    def claim(self, units: int) -> List[Tuple[int, int]]:
+        ranges = [tuple(r) for r in RemoteClaimer.__send(self.__connection(), {'op': 'claim', 'units': units})['ranges']]
+        if not ranges:
+            self.__exhausted.value = 1
+        return ranges
+
+    def complete(self, ranges: List[Tuple[int, int]]) -> None:
+        RemoteClaimer.__send(self.__connection(), {'op': 'complete', 'ranges': ranges})
+
+    def report(self, title: str, word: str, label: str) -> None:
+        # Send a match to the coordinator
+        RemoteClaimer.__send(self.__connection(), {'op': 'match', 'title': title, 'word': word, 'hash': label})
+
+    def share(self, context) -> None:
+        # Every forked process opens a connection of its own
+        pass
+
+    @property
+    def size(self) -> int:
+        # The share of the node is not known up front, the whole keyspace is
+        return self.__keyspace[0]
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.__exhausted.value)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+import logging
+import mmap
+import os
+import struct
+from array import array
+from multiprocessing import RawValue
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class DigestIndex:
+    # Cache file header: magic, version, digest width, prefix bits, table item size, digest count,
+    # the stamp of the source (modification time and size) and the name of the hash algorithm
+    __header = struct.Struct('<4sHHHHQqq16s')
+    __magic = b'CTDI'
+    __version = 1
+    # Indexes up to this many digests also keep them in a set, membership is then checked without a search
+    __member_limit = 1 << 20
+
+    def __init__(self, buffer, width: int, count: int, bits: int, table: Sequence[int], base: int = 0,
+                 stamp: Tuple[int, int] = (0, 0)) -> None:
+        # The digests are stored back to back in one sorted buffer, the table holds the start of each prefix bucket
+        self.__buffer = buffer
+        self.__base = base
+        self.__width = width
+        self.__count = count
+        self.__bits = bits
+        self.__prefix_bytes = (bits + 7) // 8
+        self.__shift = self.__prefix_bytes * 8 - bits
+        self.__table = table
+        self.__stamp = stamp
+        # Cracked digests are marked in a bitmap instead of being removed, the anonymous mappings stay shared with
+        # forked workers so that they stop matching the digests the parent has registered
+        self.__cracked = mmap.mmap(-1, max((count + 7) // 8, 1))
+        self.__discarded = RawValue('q', 0)
+        self.__members = frozenset(self) if count <= DigestIndex.__member_limit else None
+
+    @staticmethod
+    def file_stamp(path: Path) -> Tuple[int, int]:
+        # The modification time and the size of a source file, a cache is only valid for the same stamp
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def prefix_bits(count: int) -> int:
+        # Aim for a couple of digests per bucket while keeping the table reasonably small
+        return min(max((count // 2).bit_length(), 8), 24)
+
+    @staticmethod
+    def build_table(buffer, width: int, count: int, bits: int) -> array:
+        # Count the digests in each prefix bucket and turn the counts into bucket offsets
+        prefix_bytes = (bits + 7) // 8
+        shift = prefix_bytes * 8 - bits
+        table = array('I' if count < 1 << 32 else 'Q')
+        table.frombytes(bytes(table.itemsize * ((1 << bits) + 1)))
+        for idx in range(count):
+            offset = idx * width
+            table[(int.from_bytes(buffer[offset:offset+prefix_bytes], 'big') >> shift) + 1] += 1
+        for idx in range(1, len(table)):
+            table[idx] += table[idx-1]
+        return table
+
+    @staticmethod
+    def build(digests: Iterable[bytes], width: int) -> DigestIndex:
+        # Sort and deduplicate the digests into an anonymous shared mapping so that forked workers share it
+        ordered = sorted(digests)
+        unique: List[bytes] = []
+        for digest in ordered:
+            if len(digest) != width:
+                raise ValueError(f'Expected a digest of {width} bytes, got {len(digest)}')
+            if not unique or unique[-1] != digest:
+                unique.append(digest)
+        del ordered
+
+        buffer = mmap.mmap(-1, max(len(unique) * width, 1))
+        buffer.write(b''.join(unique))
+        bits = DigestIndex.prefix_bits(len(unique))
+        return DigestIndex(buffer, width, len(unique), bits, DigestIndex.build_table(buffer, width, len(unique), bits))
+
+    @staticmethod
+    def load_cache(cache_path: Path, stamp: Optional[Tuple[int, int]], algorithm: str) -> Optional[DigestIndex]:
+        # Map a cache file, unless it is missing or was not built for the given stamp, any stamp is accepted if None
+        if not cache_path.exists():
+            return None
+        with cache_path.open('rb') as cache_file:
+            header = cache_file.read(DigestIndex.__header.size)
+            if len(header) < DigestIndex.__header.size:
+                return None
+            magic, version, width, bits, itemsize, count, mtime, size, name = DigestIndex.__header.unpack(header)
+            if magic != DigestIndex.__magic or version != DigestIndex.__version or (stamp is not None and (mtime, size) != stamp) \
+                    or name.rstrip(b'\0').decode('utf8') != algorithm:
+                return None
+            buffer = mmap.mmap(cache_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        # The table and the digests are used straight from the mapping
+        table_start = DigestIndex.__header.size
+        base = table_start + itemsize * ((1 << bits) + 1)
+        if len(buffer) < base + count * width:
+            return None
+        table = memoryview(buffer)[table_start:base].cast('I' if itemsize == 4 else 'Q')
+        return DigestIndex(buffer, width, count, bits, table, base, (mtime, size))
+
+    def save_cache(self, cache_path: Path, stamp: Tuple[int, int], algorithm: str) -> None:
+        # Write the index next to its source, replacing the old cache only once the new one is complete
+        header = DigestIndex.__header.pack(DigestIndex.__magic, DigestIndex.__version, self.__width, self.__bits,
+                                           self.__table.itemsize, self.__count, stamp[0], stamp[1],
+                                           algorithm.encode('utf8'))
+        temp_path = cache_path.with_name(cache_path.name + '.tmp')
+        try:
+            with temp_path.open('wb') as cache_file:
+                cache_file.write(header)
+                cache_file.write(memoryview(self.__table).cast('B'))
+                cache_file.write(self.__buffer[self.__base:self.__base + self.__count * self.__width])
+            os.replace(temp_path, cache_path)
+            self.__stamp = stamp
+        except OSError as error:
+            logging.warning(f'Could not write the hash cache {cache_path}: {error}')
+
+    def __position(self, digest: bytes) -> int:
+        # Return the position of a digest in the index or -1, whether it is cracked or not
+        width, base = self.__width, self.__base
+        bucket = int.from_bytes(digest[:self.__prefix_bytes], 'big') >> self.__shift
+        end = base + self.__table[bucket+1] * width
+        pos = self.__buffer.find(digest, base + self.__table[bucket] * width, end)
+        while pos >= 0 and (pos - base) % width:
+            pos = self.__buffer.find(digest, pos + 1, end)
+        return (pos - base) // width if pos >= 0 else -1
+
+    def find(self, digest: bytes) -> int:
+        # Return the position of an uncracked digest in the index or -1
+        pos = self.__position(digest)
+        return pos if pos >= 0 and not self.__cracked[pos >> 3] & 1 << (pos & 7) else -1
+
+    def find_many(self, digests: List[bytes]) -> List[int]:
+        # Return the indices of the given digests that are present in the index and not cracked yet
+        members = self.__members
+        if members is not None:
+            # Most batches hold no match at all, the rare hits are checked against the cracked bitmap
+            if members.isdisjoint(digests):
+                return []
+            return [idx for idx, digest in enumerate(digests) if digest in members and self.find(digest) >= 0]
+        buffer, table, width, base, cracked = self.__buffer, self.__table, self.__width, self.__base, self.__cracked
+        prefix_bytes, shift = self.__prefix_bytes, self.__shift
+        hits = []
+        for idx, digest in enumerate(digests):
+            bucket = int.from_bytes(digest[:prefix_bytes], 'big') >> shift
+            start, end = table[bucket], table[bucket+1]
+            if start == end:
+                continue
+            end = base + end * width
+            pos = buffer.find(digest, base + start * width, end)
+            while pos >= 0 and (pos - base) % width:
+                pos = buffer.find(digest, pos + 1, end)
+            if pos >= 0:
+                pos = (pos - base) // width
+                if not cracked[pos >> 3] & 1 << (pos & 7):
+                    hits.append(idx)
+        return hits
+
+    def discard(self, digest: bytes) -> bool:
+        # Mark a digest as cracked, returns False when it is unknown or was marked already
+        pos = self.__position(digest)
+        if pos < 0 or self.__cracked[pos >> 3] & 1 << (pos & 7):
+            return False
+        self.__cracked[pos >> 3] |= 1 << (pos & 7)
+        self.__discarded.value += 1
+        return True
+
+    def __contains__(self, digest: bytes) -> bool:
+        return len(digest) == self.__width and self.find(digest) >= 0
+
+    def __len__(self) -> int:
+        return self.__count
+
+    def __iter__(self) -> Iterator[bytes]:
+        width = self.__width
+        for offset in range(self.__base, self.__base + self.__count * width, width):
+            yield self.__buffer[offset:offset+width]
+
+    @property
+    def width(self) -> int:
+        return self.__width
+
+    @property
+    def stamp(self) -> Tuple[int, int]:
+        return self.__stamp
+
+    @property
+    def remaining(self) -> int:
+        return self.__count - self.__discarded.value
@@ -1,23 +1,68 @@
+import logging
+from multiprocessing import RawArray
 from pathlib import Path
-from typing import Callable, Dict, List, Optional, Set
+from threading import Lock
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from CrackerCore.DigestIndex import DigestIndex
+from CrackerCore.utilities.algorithms import algorithms, digest_size, kdfs
 
 
 class HashGroup:
-    def __init__(self, title: str, path: Path):
+    def __init__(self, title: str, path: Path, algorithm: str = 'sha1'):
         self.__title = title
-
-        # Load the hashes from a file
-        with path.open('r') as word_file:
-            hex_hashes = word_file.read().splitlines()
-
-        self.__hashes = {bytes.fromhex(hex_hash) for hex_hash in hex_hashes}
+        self.__algorithm = algorithm
+        self.__hashes = self._int_load(path)
         self.__matches: Dict[str, str] = {}
         self.__on_match: Optional[Callable[[str, str, str], None]] = None
+        self.__lock = Lock()
+
+    def _int_load(self, path: Path) -> DigestIndex:
+        # Use the precompiled hashes if they are up to date, otherwise load them from the file and rebuild the cache
+        cache_path = path.with_name(path.name + '.ctcache')
+        stamp = DigestIndex.file_stamp(path)
+        hashes = DigestIndex.load_cache(cache_path, stamp, self.__algorithm)
+        if hashes is None:
+            with path.open('r') as word_file:
+                hex_hashes = (bytes.fromhex(line) for line in map(str.strip, word_file) if line)
+                hashes = DigestIndex.build(hex_hashes, digest_size(self.__algorithm))
+            hashes.save_cache(cache_path, stamp, self.__algorithm)
+            logging.info(f'Rebuilt the hash cache {cache_path.name}')
+        return hashes
+
+    def _int_label(self, match_hash: bytes) -> str:
+        # The form in which a matched hash is reported
+        return match_hash.hex()
+
+    def _int_discard(self, match_hash: bytes) -> bool:
+        # Remove a cracked hash from the live targets
+        return self.__hashes.discard(match_hash)
+
+    def __register(self, match: bytes, match_hash: bytes) -> Optional[str]:
+        # Register a match once, workers may still report a hash that was cracked while they were hashing
+        with self.__lock:
+            label = self._int_label(match_hash)
+            if not self._int_discard(match_hash):
+                return None
+            self.__matches[match.decode('utf8')] = label
+            return label
+
+    def add_match(self, match: bytes, match_hash: bytes) -> bool:
+        # Register a match, returns whether the hash was not cracked yet
+        label = self.__register(match, match_hash)
+        if label is None:
+            return False
+        self.__on_match(self.__title, match.decode('utf8'), label)
+        return True
+
+    def add_known(self, match: bytes, match_hash: bytes) -> bool:
+        # Register a hash that was cracked on an earlier run without announcing it
+        return self.__register(match, match_hash) is not None
 
-    def add_match(self, match: bytes, match_hash: bytes) -> None:
-        # Register a match
-        self.__matches[match.decode('utf8')] = match_hash.hex()
-        self.__on_match(self.__title, match.decode('utf8'), match_hash.hex())
+    def exclude(self, match_hash: bytes) -> bool:
+        # Stop trying to crack a hash without a match, e.g. when the guesses have been tried against it before
+        with self.__lock:
+            return self._int_discard(match_hash)
 
     def notify_on_match(self, callback: Callable[[str, str, str], None]):
         # Callback to call when a match is made
@@ -27,6 +72,15 @@ class HashGroup:
     def title(self) -> str:
         return self.__title
 
+    @property
+    def algorithm(self) -> str:
+        return self.__algorithm
+
+    @property
+    def kind(self) -> str:
+        # What a digest of this group is a hash of, the potfile keeps the digests of each kind apart
+        return self.__algorithm
+
     @property
     def matches(self) -> Dict[str, str]:
         return self.__matches
@@ -36,5 +90,90 @@ class HashGroup:
         return self.__matches.keys()
 
     @property
-    def hashes(self) -> Set[bytes]:
+    def hashes(self) -> DigestIndex:
         return self.__hashes
+
+    @property
+    def remaining(self) -> int:
+        return self.__hashes.remaining
+
+
+class SaltedHashGroup(HashGroup):
+    def __init__(self, title: str, path: Path, algorithm: str = 'sha1', salt: str = 'prefix', params: Optional[Dict] = None):
+        self.__targets: Dict[bytes, Set[bytes]] = {}
+        self.__params = params or {}
+        self.__position = salt
+        super().__init__(title, path, algorithm)
+
+        # Try the salts shared by the most targets first
+        self.__salts = sorted(self.__targets, key=lambda s: len(self.__targets[s]), reverse=True)
+        # The uncracked targets of each salt, in shared memory so that forked workers skip the cracked salts too
+        self.__left = RawArray('q', [len(self.__targets[s]) for s in self.__salts])
+        self.__positions = {salt: idx for idx, salt in enumerate(self.__salts)}
+        self.__width = self.hashes.width
+
+        # Select how a guess and a salt are hashed
+        if algorithm in kdfs:
+            kdf, width, params = kdfs[algorithm], self.__width, self.__params
+            self.__derive = lambda word, salt: kdf(word, salt, width, params)
+        elif salt == 'suffix':
+            hash_fn = algorithms[algorithm]
+            self.__derive = lambda word, salt: hash_fn(word + salt).digest()
+        else:
+            hash_fn = algorithms[algorithm]
+            self.__derive = lambda word, salt: hash_fn(salt + word).digest()
+
+    def _int_load(self, path: Path) -> DigestIndex:
+        # Each line holds a salt and a hash separated by the last colon
+        with path.open('r') as word_file:
+            for line in map(str.strip, word_file):
+                if line:
+                    salt, hex_hash = line.rsplit(':', 1)
+                    self.__targets.setdefault(salt.encode('utf8'), set()).add(bytes.fromhex(hex_hash))
+
+        digests = [digest for targets in self.__targets.values() for digest in targets]
+        width = len(digests[0]) if digests else digest_size(self.algorithm) if self.algorithm in algorithms else 32
+        return DigestIndex.build(digests, width)
+
+    def _int_label(self, match_hash: bytes) -> str:
+        salt = next((s for s in self.__salts if match_hash in self.__targets[s]), b'')
+        return f'{salt.decode("utf8")}:{match_hash.hex()}'
+
+    def _int_discard(self, match_hash: bytes) -> bool:
+        if not super()._int_discard(match_hash):
+            return False
+        for idx, salt in enumerate(self.__salts):
+            if match_hash in self.__targets[salt]:
+                self.__left[idx] -= 1
+        return True
+
+    def derive(self, word: bytes, salt: bytes) -> bytes:
+        return self.__derive(word, salt)
+
+    def targets(self, salt: bytes) -> Set[bytes]:
+        return self.__targets[salt]
+
+    @property
+    def kind(self) -> str:
+        # A key derivation already mixes the salt in, a fast hash depends on where the salt was placed
+        return self.algorithm if self.slow else f'{self.algorithm}+{self.__position}'
+
+    def cracked(self, digest: bytes) -> bool:
+        return self.hashes.find(digest) < 0
+
+    def uncracked(self, salt: bytes) -> int:
+        return self.__left[self.__positions[salt]]
+
+    @property
+    def salts(self) -> List[bytes]:
+        # The salts that still have uncracked targets
+        return [salt for idx, salt in enumerate(self.__salts) if self.__left[idx]]
+
+    @property
+    def salt_counts(self) -> List[Tuple[bytes, int]]:
+        # The salts that still have uncracked targets and how many
+        return [(salt, self.__left[idx]) for idx, salt in enumerate(self.__salts) if self.__left[idx]]
+
+    @property
+    def slow(self) -> bool:
+        return self.algorithm in kdfs
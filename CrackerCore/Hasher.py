@@ -1,47 +1,254 @@
-import hashlib
-from typing import Dict, List, Set, Tuple
+import heapq
+import os
+from itertools import count
+from queue import Empty
+from threading import Event, Lock, local
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
 
-from CrackerCore.HashGroup import HashGroup
+from CrackerCore.HashGroup import HashGroup, SaltedHashGroup
+from CrackerCore.Potfile import Potfile
+from CrackerCore.utilities.algorithms import algorithms
+from CrackerCore.utilities.claim import Counter
+from CrackerCore.utilities.dedup import CandidateFilter
 
 
 class Hasher:
-    __algorithms = {
-        'sha1': hashlib.sha1
-    }
+    __recent_size = 64
+    # The slow groups are checked in units of a salt and a few guesses, the workers only take on new guesses
+    # while fewer derivations than the backlog are waiting
+    __slow_unit = 8
+    __slow_backlog = 1024
+    # The suffixed checks reuse the hash state of the prefix only from this prefix length and suffix count on
+    __midstate_prefix = 64
+    __midstate_suffixes = 64
 
-    def __init__(self, algorithm: str) -> None:
-        self.__hash = Hasher.__algorithms[algorithm]
-        self.__hashes = set()
+    def __init__(self) -> None:
         self.__group_objs: List[HashGroup] = []
-        self.__groups: Dict[bytes, HashGroup] = {}
+        # The groups by their hash algorithm, each needed digest is computed once per guess
+        self.__routes: Dict[str, List[HashGroup]] = {}
+        # Salted groups are checked salt by salt, the slow ones are deferred and scheduled separately
+        self.__salted: List[SaltedHashGroup] = []
+        self.__slow: List[SaltedHashGroup] = []
+        self.__units: List[Tuple] = []
+        self.__units_lock = Lock()
+        self.__unit_order = count()
+        self.__pending = 0
+        self.__tickets = local()
         self.__recent: bytes = b''
+        self.__owner = os.getpid()
+        self.__queue = None
+        self.__reported: Optional[Counter] = None
+        self.__registered = 0
+        self.__registered_lock = Lock()
+        self.__shared_recent = None
+        self.__exhausted = Event()
+        self.__potfile: Optional[Potfile] = None
+        self.__filter: Optional[CandidateFilter] = None
+
+    @staticmethod
+    def hash(source: bytes, algorithm: str = 'sha1') -> bytes:
+        return algorithms[algorithm](source).digest()
+
+    def __lookup(self, groups: List[HashGroup], hashed: List[bytes], word: Callable[[int], bytes]) -> None:
+        # Look the whole batch up in the index of each group
+        for group in groups:
+            for idx in group.hashes.find_many(hashed):
+                # Register password match
+                self.__report(group, word(idx), hashed[idx])
+
+    def check(self, words: Iterable[bytes]) -> None:
+        # Check the guesses against the hashes, each guess is hashed exactly once per algorithm
+        self.__check(list(words))
+
+    def __check(self, words: List[bytes]) -> None:
+        if self.__filter is not None:
+            # Candidates that were checked recently are not hashed again
+            words = [words[idx] for idx in self.__filter.fresh(words)]
+        for algorithm, groups in self.__routes.items():
+            # Groups that are cracked completely drop out, an algorithm without groups left is not hashed at all
+            groups = [group for group in groups if group.remaining]
+            if not groups:
+                continue
+            hash_fn = algorithms[algorithm]
+            self.__lookup(groups, [hash_fn(word).digest() for word in words], words.__getitem__)
+        self.__check_salted(words)
+        self.__defer(words)
 
-    def hash(self, source: bytes) -> bytes:
-        return self.__hash(source).digest()
-
-    def check(self, words: Set[bytes]) -> None:
-        # Check a set of guesses against the hashes
-        hashes = {self.hash(word) for word in words}
-
-        # If a match was found, take a closer look
-        if self.__hashes & hashes:
-            for word in words:
-                hashed = self.hash(word)
-                group = self.__groups.get(hashed, None)
-                if group:
-                    # Register password match
-                    group.add_match(word, hashed)
         if words:
             # Update a recent hashed password for the ui
-            self.__recent = words.pop()
+            self.__recent = words[-1]
+            if self.__shared_recent is not None:
+                self.__shared_recent.value = self.__recent[:Hasher.__recent_size-1]
+
+    def check_suffixed(self, prefix: bytes, suffixes: Sequence[bytes]) -> None:
+        # Check the prefix followed by each suffix, the hash state of the prefix is computed once and copied.
+        # Copying only saves work once the prefix fills a hash block and there are enough suffixes to share it
+        if len(prefix) < Hasher.__midstate_prefix or len(suffixes) < Hasher.__midstate_suffixes:
+            self.__check([prefix + suffix for suffix in suffixes])
+            return
+        words: Optional[List[bytes]] = None
+        if self.__filter is not None:
+            words = [prefix + suffix for suffix in suffixes]
+            fresh = self.__filter.fresh(words)
+            if len(fresh) < len(suffixes):
+                suffixes = [suffixes[idx] for idx in fresh]
+                words = [words[idx] for idx in fresh]
+        for algorithm, groups in self.__routes.items():
+            groups = [group for group in groups if group.remaining]
+            if not groups:
+                continue
+            copy = algorithms[algorithm](prefix).copy
+            hashed = []
+            for suffix in suffixes:
+                state = copy()
+                state.update(suffix)
+                hashed.append(state.digest())
+            self.__lookup(groups, hashed, words.__getitem__ if words is not None else lambda idx: prefix + suffixes[idx])
+        if any(group.remaining for group in self.__salted + self.__slow):
+            # The salt breaks the shared prefix, the salted groups get the whole guesses
+            if words is None:
+                words = [prefix + suffix for suffix in suffixes]
+            self.__check_salted(words)
+            self.__defer(words)
+
+        if suffixes:
+            # Update a recent hashed password for the ui
+            self.__recent = prefix + suffixes[-1]
+            if self.__shared_recent is not None:
+                self.__shared_recent.value = self.__recent[:Hasher.__recent_size-1]
+
+    def __check_salted(self, words: List[bytes]) -> None:
+        # Each guess is hashed once per unique salt, the salts with the most targets are tried first
+        for group in self.__salted:
+            for salt in group.salts:
+                self.__check_salt(group, salt, words)
+
+    def __check_salt(self, group: SaltedHashGroup, salt: bytes, words: Sequence[bytes]) -> None:
+        derive, targets = group.derive, group.targets(salt)
+        for word in words:
+            hashed = derive(word, salt)
+            if hashed in targets and not group.cracked(hashed):
+                self.__report(group, word, hashed)
+
+    def __ticket(self) -> List:
+        # The number of units deferred by this thread since it last asked to be called back, and the callbacks
+        ticket = getattr(self.__tickets, 'ticket', None)
+        if ticket is None:
+            ticket = self.__tickets.ticket = [0, []]
+        return ticket
+
+    def __defer(self, words: List[bytes]) -> None:
+        # Queue a unit for each salt and few guesses, the salts with the most uncracked targets go first
+        # whichever batch their guesses came from
+        groups = [group for group in self.__slow if group.remaining]
+        if not groups or not words:
+            return
+        ticket = self.__ticket()
+        chunks = [tuple(words[idx:idx+Hasher.__slow_unit]) for idx in range(0, len(words), Hasher.__slow_unit)]
+        with self.__units_lock:
+            for group in groups:
+                for salt, left in group.salt_counts:
+                    for chunk in chunks:
+                        heapq.heappush(self.__units, (-left, next(self.__unit_order), group, salt, chunk, ticket))
+                    ticket[0] += len(chunks)
+                    self.__pending += len(words)
+
+    def after(self, callback: Callable[[], None]) -> None:
+        # Call back once the guesses this thread has checked so far went through the slow groups as well,
+        # right away if none of them are waiting
+        ticket, self.__tickets.ticket = getattr(self.__tickets, 'ticket', None), None
+        if ticket is not None:
+            with self.__units_lock:
+                if ticket[0]:
+                    ticket[1].append(callback)
+                    return
+        callback()
+
+    def work(self, budget: float) -> bool:
+        # Work off the deferred units for about the given number of seconds, returns False if none were waiting
+        deadline = perf_counter() + budget
+        worked = False
+        while perf_counter() < deadline or not worked:
+            with self.__units_lock:
+                if not self.__units:
+                    break
+                _, _, group, salt, chunk, ticket = heapq.heappop(self.__units)
+            worked = True
+            # A salt whose targets were all cracked in the meantime is skipped
+            if group.uncracked(salt):
+                self.__check_salt(group, salt, chunk)
+
+            with self.__units_lock:
+                self.__pending -= len(chunk)
+                ticket[0] -= 1
+                callbacks = ticket[1] if not ticket[0] else ()
+            for callback in callbacks:
+                callback()
+        return worked
+
+    def __report(self, group: HashGroup, word: bytes, hashed: bytes) -> None:
+        # Matches made in a worker process are sent to the parent for registration
+        if self.__queue is not None and os.getpid() != self.__owner:
+            self.__queue.put((self.__group_objs.index(group), word, hashed))
+            self.__reported.add(1)
+        else:
+            self.__register(group, word, hashed)
+
+    def __register(self, group: HashGroup, word: bytes, hashed: bytes) -> None:
+        if group.add_match(word, hashed) and self.__potfile is not None:
+            self.__potfile.add(group.kind, word, hashed)
+        if self.exhausted:
+            self.__exhausted.set()
+
+    def share(self, context) -> None:
+        # Prepare the hasher to be used from forked worker processes
+        self.__owner = os.getpid()
+        self.__queue = context.Queue()
+        self.__reported = Counter()
+        self.__reported.share(context)
+        self.__shared_recent = context.Array('c', Hasher.__recent_size, lock=False)
+        if self.__filter is not None:
+            self.__filter.share(context)
+
+    def collect(self, timeout: float) -> None:
+        # Register the matches reported by the worker processes
+        if self.__queue is None:
+            return
+        try:
+            while True:
+                group_idx, word, hashed = self.__queue.get(timeout=timeout) if timeout else self.__queue.get_nowait()
+                self.__register(self.__group_objs[group_idx], word, hashed)
+                with self.__registered_lock:
+                    self.__registered += 1
+        except Empty:
+            pass
+
+    def settle(self, timeout: float = 10) -> None:
+        # Register every match the worker processes reported up to now, a worker reports its matches before it
+        # completes the words they came from, so the matches of the words completed so far are all registered
+        if self.__queue is None:
+            return
+        reported = self.__reported.value
+        deadline = perf_counter() + timeout
+        while self.__registered < reported and perf_counter() < deadline:
+            self.collect(timeout=0.1)
+
+    def use_potfile(self, potfile: Potfile) -> None:
+        # Store the new matches in a potfile as they are registered
+        self.__potfile = potfile
+
+    def use_filter(self, candidate_filter: CandidateFilter) -> None:
+        # Skip the candidates the filter has seen already
+        self.__filter = candidate_filter
 
     def add_group(self, group: HashGroup) -> None:
-        # Add a set of hashes for checking
+        # Add a set of hashes for checking, the group's index is used as is
         self.__group_objs.append(group)
-        new_hashes = group.hashes
-        self.__hashes |= new_hashes
-        for hash in new_hashes:
-            self.__groups[hash] = group
+        if isinstance(group, SaltedHashGroup):
+            (self.__slow if group.slow else self.__salted).append(group)
+        else:
+            self.__routes.setdefault(group.algorithm, []).append(group)
 
     def matches(self) -> Dict[str, Tuple[Tuple[str, str]]]:
         # Return the matches for each hash set
@@ -50,7 +257,27 @@ class Hasher:
             result_dict[hash_group.title] = tuple([tuple(i) for i in hash_group.matches.items()])
         return result_dict
 
+    def wait_exhausted(self, timeout: float) -> bool:
+        # Wait until every hash has been cracked or the timeout passes
+        return self.exhausted or self.__exhausted.wait(timeout)
+
+    @property
+    def exhausted(self) -> bool:
+        # Whether every hash of every group has been cracked
+        return bool(self.__group_objs) and not any(group.remaining for group in self.__group_objs)
+
+    @property
+    def backlogged(self) -> bool:
+        # Whether enough slow units are waiting that the workers should work them off before taking new guesses
+        return self.__pending >= Hasher.__slow_backlog
+
+    @property
+    def skipped(self) -> int:
+        # How many duplicate candidates were not hashed
+        return self.__filter.skipped if self.__filter is not None else 0
+
     @property
     def recent_word(self) -> str:
         # Return a recently hashed guess
-        return self.__recent.decode('utf8')
+        recent = self.__shared_recent.value if self.__shared_recent is not None else self.__recent
+        return recent.decode('utf8', errors='replace')
@@ -0,0 +1,151 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from CrackerCore.HashGroup import HashGroup
+
+
+class Ledger:
+    __read_size = 1 << 20
+
+    def __init__(self, path: Path) -> None:
+        # The ledger lists the completed jobs, a job is a dictionary, a pipeline and a hash set along with the
+        # stamp and the digest the two files had, a later job only needs the words and the targets added since
+        self.__path = path
+        self.__jobs: List[Dict] = []
+        if path.exists():
+            with path.open('r') as ledger_file:
+                self.__jobs = json.load(ledger_file).get('jobs', [])
+        self.__planned: List[Dict] = []
+
+    @staticmethod
+    def fingerprint(spec: Dict) -> str:
+        return hashlib.sha1(json.dumps(spec, sort_keys=True).encode('utf8')).hexdigest()
+
+    @staticmethod
+    def __stamp(path: Path) -> Dict:
+        # The size, the modification time and a digest of the first and the last block of a file, a file with
+        # the same stamp is taken to be unchanged without hashing all of it
+        stat = path.stat()
+        state = hashlib.sha1()
+        with path.open('rb') as source:
+            state.update(source.read(Ledger.__read_size))
+            if stat.st_size > Ledger.__read_size:
+                source.seek(max(stat.st_size - Ledger.__read_size, Ledger.__read_size))
+                state.update(source.read(Ledger.__read_size))
+        return {'path': str(path.resolve()), 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'blocks': state.hexdigest()}
+
+    @staticmethod
+    def __digests(path: Path, sizes: Iterable[int]) -> Tuple[Dict[int, Tuple[str, bool]], str]:
+        # Hash the file once, noting the digest of each given prefix and whether the prefix ends on a full line
+        size = path.stat().st_size
+        marks = sorted(s for s in set(sizes) if s <= size)
+        prefixes: Dict[int, Tuple[str, bool]] = {}
+        state = hashlib.sha1()
+        position, last = 0, b'\n'
+        with path.open('rb') as source:
+            for mark in marks + [size]:
+                while position < mark:
+                    data = source.read(min(Ledger.__read_size, mark - position))
+                    if not data:
+                        break
+                    state.update(data)
+                    position += len(data)
+                    last = data[-1:]
+                prefixes[mark] = (state.hexdigest(), position == 0 or last == b'\n')
+        return prefixes, prefixes[size][0]
+
+    @staticmethod
+    def __prefixes(path: Path, now: Dict, olds: List[Dict]) -> Dict[int, Tuple[str, bool]]:
+        # The digest of the file at each of the old sizes and whether it ends on a full line there, the file is
+        # only hashed in full when its stamp differs from the old ones
+        if all(old.get('digest') and all(old.get(key) == now[key] for key in ('size', 'mtime', 'blocks')) for old in olds):
+            if olds:
+                now['digest'] = olds[0]['digest']
+            return {old['size']: (old['digest'], True) for old in olds}
+        prefixes, now['digest'] = Ledger.__digests(path, [old['size'] for old in olds])
+        return prefixes
+
+    @staticmethod
+    def __targets(path: Path, size: int) -> Iterable[bytes]:
+        # The digests on the lines of the hash set that were part of the earlier job
+        with path.open('rb') as hash_file:
+            for line in hash_file.read(size).splitlines():
+                line = line.strip()
+                if line:
+                    yield bytes.fromhex(line.rsplit(b':', 1)[-1].decode('ascii'))
+
+    def __find(self, job: Dict) -> Optional[Dict]:
+        for old in self.__jobs:
+            if old['pipeline'] == job['pipeline'] and old['setup'] == job['setup'] \
+                    and old['dictionary']['path'] == job['dictionary']['path'] \
+                    and old['hash_set']['path'] == job['hash_set']['path']:
+                return old
+        return None
+
+    def plan(self, dictionary: Path, pipeline: Dict, hash_sets: List[Tuple[Dict, HashGroup]]) -> int:
+        # Remove the targets the dictionary and the pipeline were already tried against and return the offset
+        # of the first dictionary byte that some hash set still needs
+        pipeline_fp = Ledger.fingerprint({'variators': pipeline['variators'], 'hash_sources': pipeline['hash_sources']})
+        dictionary_now = Ledger.__stamp(dictionary)
+        olds = [old for old in self.__jobs if old['pipeline'] == pipeline_fp and old['dictionary']['path'] == dictionary_now['path']]
+        dictionary_prefixes = Ledger.__prefixes(dictionary, dictionary_now, [old['dictionary'] for old in olds])
+
+        start = dictionary_now['size']
+        for hash_set, group in hash_sets:
+            hash_path = Path(hash_set['path'])
+            setup = Ledger.fingerprint({'kind': group.kind, 'params': {k: v for k, v in hash_set.items() if k in ('iterations', 'n', 'r', 'p')}})
+            job = {'pipeline': pipeline_fp, 'setup': setup, 'dictionary': dictionary_now, 'hash_set': Ledger.__stamp(hash_path)}
+            old = self.__find(job)
+            hash_prefixes = Ledger.__prefixes(hash_path, job['hash_set'], [old['hash_set']] if old else [])
+            self.__planned.append(job)
+
+            # The old job only counts if both files have merely grown by whole lines since
+            if old is None or dictionary_prefixes.get(old['dictionary']['size']) != (old['dictionary']['digest'], True) \
+                    or hash_prefixes.get(old['hash_set']['size']) != (old['hash_set']['digest'], True):
+                start = 0
+                continue
+
+            new_words = old['dictionary']['size'] < dictionary_now['size']
+            new_targets = old['hash_set']['size'] < job['hash_set']['size']
+            if new_words and new_targets:
+                start = 0
+            elif new_words:
+                # Only the appended words are needed for this hash set
+                start = min(start, old['dictionary']['size'])
+                logging.info(f'{group.title} was tried with the first {old["dictionary"]["size"]} bytes of the dictionary already')
+            else:
+                # The dictionary has been tried against the old targets, the new ones need all of it
+                excluded = sum(group.exclude(digest) for digest in Ledger.__targets(hash_path, old['hash_set']['size']))
+                logging.info(f'{excluded} hashes of {group.title} were tried with this dictionary and pipeline already')
+                if new_targets:
+                    start = 0
+        return start
+
+    def record(self) -> None:
+        # Mark the planned jobs completed, each replaces the earlier job of the same combination
+        for job in self.__planned:
+            # The files of a new job are hashed now that it is complete, unless they changed during the job
+            files = [job['dictionary'], job['hash_set']]
+            if any(Ledger.__stamp(Path(file['path'])) != {k: v for k, v in file.items() if k != 'digest'} for file in files):
+                logging.warning('The files of the job changed while it ran, it is not recorded')
+                continue
+            for file in files:
+                if 'digest' not in file:
+                    file['digest'] = Ledger.__digests(Path(file['path']), [])[1]
+            old = self.__find(job)
+            if old is not None:
+                self.__jobs.remove(old)
+            self.__jobs.append(job)
+        self.__planned = []
+
+        temp_path = self.__path.with_name(self.__path.name + '.tmp')
+        try:
+            with temp_path.open('w') as ledger_file:
+                json.dump({'jobs': self.__jobs}, ledger_file, indent=1)
+            os.replace(temp_path, self.__path)
+        except OSError as error:
+            logging.warning(f'Could not write the job ledger {self.__path}: {error}')
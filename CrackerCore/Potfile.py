@@ -0,0 +1,132 @@
+from __future__ import annotations
+import logging
+import mmap
+from array import array
+from itertools import chain
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+from CrackerCore.DigestIndex import DigestIndex
+from CrackerCore.HashGroup import HashGroup
+
+
+class Potfile:
+    # Lines appended after the index was built are scanned on load, past this many the index is rebuilt
+    __max_tail = 1 << 16
+
+    def __init__(self, path: Path) -> None:
+        # The potfile is an append-only log of kind:digest:password lines, each kind of digest gets an index
+        # of the digests and a parallel table of the line offsets that is rebuilt as the log grows
+        self.__path = path
+        self.__lock = Lock()
+        self.__log = None
+
+    @staticmethod
+    def encode(word: bytes) -> bytes:
+        # Passwords that are not printable text are stored as hex
+        try:
+            if word.decode('utf8').isprintable():
+                return word
+        except UnicodeDecodeError:
+            pass
+        return b'$HEX[' + word.hex().encode('ascii') + b']'
+
+    @staticmethod
+    def decode(word: bytes) -> bytes:
+        if word.startswith(b'$HEX[') and word.endswith(b']'):
+            return bytes.fromhex(word[5:-1].decode('ascii'))
+        return word
+
+    def passwords(self) -> Iterator[bytes]:
+        # The cracked passwords of every kind, e.g. for training a model
+        if not self.__path.exists():
+            return
+        with self.__path.open('rb') as log:
+            for line in log:
+                parts = line.rstrip(b'\n').split(b':', 2)
+                if len(parts) == 3 and parts[2]:
+                    yield Potfile.decode(parts[2])
+
+    def __entries(self, kind: str, width: int, start: int) -> Iterator[Tuple[bytes, int]]:
+        # Yield the digests of a kind and the offsets of their lines, starting from the given offset
+        prefix = kind.encode('utf8') + b':'
+        with self.__path.open('rb') as log:
+            log.seek(start)
+            offset = start
+            for line in log:
+                if line.startswith(prefix) and line.endswith(b'\n'):
+                    try:
+                        digest = bytes.fromhex(line.split(b':', 2)[1].decode('ascii'))
+                    except (ValueError, IndexError):
+                        digest = b''
+                    if len(digest) == width:
+                        yield digest, offset
+                    else:
+                        logging.warning(f'Skipping a malformed potfile line at {offset}')
+                offset += len(line)
+
+    def __index(self, kind: str, width: int) -> Tuple[DigestIndex, memoryview, Dict[bytes, int]]:
+        # Load the index of a kind and scan the lines appended after it, rebuilding it when it is missing or stale
+        cache_path = self.__path.with_name(f'{self.__path.name}.{kind}.ctcache')
+        offsets_path = self.__path.with_name(f'{self.__path.name}.{kind}.ctoffsets')
+        size = self.__path.stat().st_size
+        index = DigestIndex.load_cache(cache_path, None, kind)
+        if index is not None and index.width == width and index.stamp[1] <= size and offsets_path.exists():
+            with offsets_path.open('rb') as offsets_file:
+                offsets = memoryview(mmap.mmap(offsets_file.fileno(), 0, access=mmap.ACCESS_READ)).cast('Q') \
+                    if len(index) else memoryview(array('Q'))
+            tail: Dict[bytes, int] = {}
+            for digest, offset in self.__entries(kind, width, index.stamp[1]):
+                tail.setdefault(digest, offset)
+                if len(tail) > Potfile.__max_tail:
+                    break
+            else:
+                return index, offsets, tail
+
+        # Sort the entries by their digest, the first line of a digest wins like it does in the tail
+        entries = sorted(self.__entries(kind, width, 0))
+        digests: List[bytes] = []
+        ordered = array('Q')
+        for digest, offset in entries:
+            if digests and digests[-1] == digest:
+                continue
+            digests.append(digest)
+            ordered.append(offset)
+        index = DigestIndex.build(digests, width)
+        with offsets_path.open('wb') as offsets_file:
+            ordered.tofile(offsets_file)
+        index.save_cache(cache_path, (0, size), kind)
+        logging.info(f'Rebuilt the potfile index of {kind} with {len(index)} hashes')
+        return index, memoryview(ordered), {}
+
+    def premark(self, group: HashGroup) -> int:
+        # Register the hashes of the group that are in the potfile already, returns how many were found
+        if not self.__path.exists():
+            return 0
+        index, offsets, tail = self.__index(group.kind, group.hashes.width)
+        found = 0
+        with self.__path.open('rb') as log:
+            # Walk the potfile entries of the kind and look each one up in the group, the targets are not copied
+            for digest, offset in chain(zip(index, offsets), tail.items()):
+                if digest not in group.hashes:
+                    continue
+                log.seek(offset)
+                word = Potfile.decode(log.readline().rstrip(b'\n').split(b':', 2)[2])
+                if group.add_known(word, digest):
+                    found += 1
+        return found
+
+    def add(self, kind: str, word: bytes, digest: bytes) -> None:
+        # Append a cracked hash to the log as soon as it is found
+        with self.__lock:
+            if self.__log is None:
+                self.__log = self.__path.open('ab')
+            self.__log.write(kind.encode('utf8') + b':' + digest.hex().encode('ascii') + b':' + Potfile.encode(word) + b'\n')
+            self.__log.flush()
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__log is not None:
+                self.__log.close()
+                self.__log = None
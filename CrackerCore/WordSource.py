@@ -1,67 +1,147 @@
+import mmap
+import random
 from pathlib import Path
-from threading import Lock
-from typing import Callable, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 
-from CrackerCore.Hasher import Hasher
-from CrackerCore.utilities.exceptions import TryAgain, WordSourceEmpty
-from CrackerCore.variators.Variator import Variator
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.claim import Counter, RangeClaimer
+from CrackerCore.utilities.exceptions import WordSourceEmpty
 
 
-class WordSource:
+class WordSource(Source):
+    __sample_size = 1 << 16
+    __block_size = 1 << 20
+    __grain = 512
+
     def __init__(self, path: Path) -> None:
-        self.__variator: Optional[Variator] = None
-        self.__hasher: Optional[Hasher] = None
-        self.__lock = Lock()
+        super().__init__()
+
+        # Map the dictionary into memory, the line boundaries are only looked up as the words are claimed
+        with path.open('rb') as word_file:
+            self.__size = path.stat().st_size
+            self.__map = mmap.mmap(word_file.fileno(), 0, access=mmap.ACCESS_READ) if self.__size else b''
+        if hasattr(mmap, 'MADV_SEQUENTIAL') and self.__size:
+            self.__map.madvise(mmap.MADV_SEQUENTIAL)
+
+        # Estimate the word count from the line lengths at the start of the file
+        sample = self.__map[:WordSource.__sample_size]
+        self.__sample_lines = max(len(sample.splitlines()), 1)
+        self.__sample_bytes = max(len(sample), 1)
+
+        # The file is claimed in small byte ranges, the counters refine the word count estimate
+        self.__start = 0
+        self.__make_claimer: Callable = RangeClaimer
+        self.__claimer = RangeClaimer(self.__size, WordSource.__grain)
+        self.__scanned = Counter()
+        self.__progress = Counter()
 
-        # Load a dictionary
-        with path.open('r') as word_file:
-            self.__wordlist = word_file.read().encode('utf8').splitlines()
+    def __read(self, start: int, end: int) -> List[bytes]:
+        # A claim owns the lines that start within its byte range
+        if start > 0 and self.__map[start-1:start] != b'\n':
+            begin = self.__map.find(b'\n', start, end)
+            if begin < 0:
+                return []
+            begin += 1
+        else:
+            begin = start
+        finish = self.__map.find(b'\n', end - 1) if end < self.__size else self.__size
+        finish = self.__size if finish < 0 else finish
 
-        self.__wordcount = len(self.__wordlist)
-        self.__left = self.__wordcount
-        self.__progress = 0
+        return self.__map[begin:finish].splitlines() if begin < finish else []
 
-    def push(self, count: int) -> None:
-        if self.__left <= 0:
+    def push(self, count: int) -> int:
+        # Claim byte ranges expected to hold the given number of words
+        scanned, progress = self.__scanned.value, self.__progress.value
+        line_length = scanned / progress if progress else self.__sample_bytes / self.__sample_lines
+        ranges = [(self.__start + start, self.__start + end) for start, end in self.__claimer.claim(int(count * line_length))]
+        if not ranges:
             raise WordSourceEmpty()
 
         # Load a set of guesses
-        batch = set()
-        if self.__lock.acquire(blocking=True, timeout=1):
-            if count < self.__left:
-                batch |= set(self.__wordlist[self.__progress : self.__progress + count])
-                self.__progress += count
-                self.__left -= count
-            else:
-                batch |= set(self.__wordlist[self.__progress:])
-                self.__left = 0
-                self.__progress = self.__wordcount
-            self.__lock.release()
-        else:
-            raise TryAgain('Could not ackquire a lock')
-        
-        # Push the guesses into the pipeline
-        if self.__hasher is not None:
-            self.__hasher.check(batch)
-        if self.__variator is not None:
-            self.__variator.endpoint(batch)
-
-    def use_variator(self, variator: Variator) -> None:
-        # Send all outputs to a variator
-        self.__variator = variator
-
-    def use_hasher(self, hasher: Hasher) -> None:
-        # Send all outputs to a hasher
-        self.__hasher = hasher
+        words = []
+        for start, end in ranges:
+            words.extend(self.__read(start, end))
+        self._int_then(set(words))
+        self._int_done(lambda: self.__claimer.complete([(start - self.__start, end - self.__start) for start, end in ranges]))
+
+        # Refine the word count estimate with the scanned ranges
+        self.__scanned.add(sum(end - start for start, end in ranges))
+        self.__progress.add(len(words))
+        return len(words)
+
+    def __lines(self) -> Iterator[bytes]:
+        # The lines of the dictionary split a block at a time, the map is not copied as a whole
+        start = 0
+        while start < self.__size:
+            end = min(start + WordSource.__block_size, self.__size)
+            if end < self.__size:
+                newline = self.__map.find(b'\n', end)
+                end = self.__size if newline < 0 else newline + 1
+            yield from self.__map[start:end].splitlines()
+            start = end
+
+    def words(self) -> List[bytes]:
+        return list(filter(None, dict.fromkeys(self.__lines())))
+
+    def start_at(self, offset: int) -> bool:
+        # Only the words from the given line boundary onwards are claimed
+        if offset and self.__map[offset-1:offset] != b'\n':
+            return False
+        self.__start = min(offset, self.__size)
+        self.__claimer = self.__make_claimer(self.__size - self.__start, WordSource.__grain)
+        return True
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        self.__make_claimer = make_claimer
+        self.__claimer = make_claimer(self.__size - self.__start, WordSource.__grain)
+        return True
+
+    def sample(self, count: int) -> List[bytes]:
+        # Take the lines that start after random offsets, a line that follows a long one is picked more often
+        words = []
+        for offset in sorted(random.randrange(self.__size) for _ in range(count)) if self.__size else ():
+            begin = self.__map.find(b'\n', offset - 1) + 1 if offset else 0
+            if 0 < begin < self.__size or offset == 0:
+                end = self.__map.find(b'\n', begin)
+                word = self.__map[begin:end if end >= 0 else self.__size].rstrip(b'\r')
+                if word:
+                    words.append(word)
+        return words
+
+    def checkpoint(self) -> Optional[Dict]:
+        return {'size': self.__size, 'start': self.__start, 'done': self.__claimer.save(),
+                'scanned': self.__scanned.value, 'progress': self.__progress.value}
+
+    def restore(self, state: Dict) -> bool:
+        # The dictionary has to be the same size it was when the checkpoint was written
+        if state.get('size') != self.__size or not self.start_at(state['start']):
+            return False
+        self.__claimer.load(state['done'])
+        self.__scanned.add(state['scanned'])
+        self.__progress.add(state['progress'])
+        return True
+
+    def share(self, context) -> None:
+        # Share the claiming state with forked worker processes
+        self.__claimer.share(context)
+        self.__scanned.share(context)
+        self.__progress.share(context)
 
     @property
     def length(self):
-        return self.__wordcount
+        # An estimate of the word count which gets exact once the whole file has been scanned, a shard only
+        # counts the bytes it claims
+        scanned, progress, size = self.__scanned.value, self.__progress.value, self.__claimer.size
+        if scanned:
+            return progress + round((size - scanned) * progress / scanned)
+        return round(size * self.__sample_lines / self.__sample_bytes)
 
     @property
     def progress(self):
-        return self.__progress
+        return self.__progress.value
 
     @property
     def words_left(self) -> int:
-        return self.__left
+        if self.__claimer.exhausted:
+            return 0
+        return max(self.length - self.__progress.value, 1)
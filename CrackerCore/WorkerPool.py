@@ -1,35 +1,59 @@
 import logging
-from threading import Thread
-from typing import Tuple
+import multiprocessing
+import signal
+from threading import Thread, current_thread
+from time import perf_counter
+from typing import Optional, Tuple
 
-from CrackerCore.WordSource import WordSource
-from CrackerCore.utilities.exceptions import TryAgain, WordSourceEmpty
+from CrackerCore.Hasher import Hasher
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.exceptions import WordSourceEmpty
 
 
 class Worker:
-    def __init__(self, name: str, word_source: WordSource) -> None:
+    __max_batch = 1 << 20
+
+    def __init__(self, name: str, word_source: Source, hasher: Hasher, batch_time: float) -> None:
         self.__name = name
         self.__word_source = word_source
+        self.__hasher = hasher
+        self.__batch_time = batch_time
         self.__thread = Thread(name=self.__name, target=self.__run)
         self.__active = False
         self.__status = 'Not Started'
         self.__processed = 0
 
+    @staticmethod
+    def adapt(batch: int, elapsed: float, batch_time: float) -> int:
+        # Scale the batch towards the targeted wall-time, at most doubling or halving it at once
+        factor = min(max(batch_time / elapsed, 0.5), 2.0) if elapsed > 0 else 2.0
+        return min(max(int(batch * factor), 1), Worker.__max_batch)
+
     def __run(self) -> None:
         self.__status = 'Running'
         logging.info('Workloop was started')
 
         # While running:
+        batch = 100
         while self.__active:
             try:
                 # Make the word source push guesses into the processing pipeline
-                self.__word_source.push(100)
-                self.__processed += 100
-            except TryAgain:
-                logging.warning('Failed to push words to the pipeline')
+                start = perf_counter()
+                self.__processed += self.__word_source.push(batch)
+                # Work off the slow hashes the guesses were deferred to before taking new ones
+                while self.__hasher.backlogged and self.__active:
+                    self.__hasher.work(self.__batch_time)
+                batch = Worker.adapt(batch, perf_counter() - start, self.__batch_time)
             except WordSourceEmpty:
+                # The slow hashes that are still waiting are worked off before stopping
+                while self.__hasher.work(self.__batch_time) and self.__active:
+                    pass
                 logging.info('No more words to process, thread marked for termination')
                 self.__active = False
+            except OSError as error:
+                # A lost coordinator leaves nothing to claim or report to, the worker stops instead of dying
+                logging.error(f'Stopping after a connection error: {error}')
+                self.__active = False
         self.__status = 'Finished'
         logging.info('Workloop has terminated')
 
@@ -53,22 +77,140 @@ class Worker:
         self.__status = 'Terminating'
         self.__active = False
 
+    def join(self) -> None:
+        if self.__thread.is_alive():
+            self.__thread.join()
+
+
+class ProcessWorker:
+    __statuses = ('Not Started', 'Running', 'Terminating', 'Finished')
+
+    def __init__(self, name: str, word_source: Source, hasher: Hasher, batch_time: float, context) -> None:
+        self.__name = name
+        self.__word_source = word_source
+        self.__hasher = hasher
+        self.__batch_time = batch_time
+        # The status and the counters live in shared memory so the parent can display them
+        self.__status = context.Value('b', 0, lock=False)
+        self.__processed = context.Value('q', 0, lock=False)
+        self.__active = context.Event()
+        self.__process = context.Process(name=self.__name, target=self.__run, daemon=True)
+
+    def __run(self) -> None:
+        # Interrupts are handled by the parent which then signals the workers to stop
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        current_thread().name = self.__name
+
+        if self.__status.value == 0:
+            self.__status.value = 1
+        logging.info('Workloop was started')
+
+        # While running:
+        batch = 100
+        while self.__active.is_set():
+            try:
+                # Make the word source push guesses into the processing pipeline
+                start = perf_counter()
+                self.__processed.value += self.__word_source.push(batch)
+                # Work off the slow hashes the guesses were deferred to before taking new ones
+                while self.__hasher.backlogged and self.__active.is_set():
+                    self.__hasher.work(self.__batch_time)
+                batch = Worker.adapt(batch, perf_counter() - start, self.__batch_time)
+            except WordSourceEmpty:
+                # The slow hashes that are still waiting are worked off before stopping
+                while self.__hasher.work(self.__batch_time) and self.__active.is_set():
+                    pass
+                logging.info('No more words to process, process marked for termination')
+                self.__active.clear()
+            except OSError as error:
+                # A lost coordinator leaves nothing to claim or report to, the worker stops instead of dying
+                logging.error(f'Stopping after a connection error: {error}')
+                self.__active.clear()
+        self.__status.value = 3
+        logging.info('Workloop has terminated')
+
+    @property
+    def name(self) -> str:
+        return self.__name
+
+    @property
+    def status(self) -> str:
+        # A process that died unexpectedly is reported as finished as well
+        if self.__process.exitcode is not None:
+            return 'Finished'
+        return ProcessWorker.__statuses[self.__status.value]
+
+    @property
+    def processed(self) -> str:
+        return self.__processed.value
+
+    def start(self) -> None:
+        self.__active.set()
+        self.__process.start()
+
+    def stop(self) -> None:
+        if self.__status.value != 3:
+            self.__status.value = 2
+        self.__active.clear()
+
+    def join(self) -> None:
+        if self.__process.is_alive():
+            self.__process.join()
+
+
 class WorkerPool:
-    def __init__(self, threads: int, word_source: WordSource) -> None:
+    def __init__(self, threads: int, word_source: Source, hasher: Hasher, backend: str = 'thread', batch_time: float = 0.05) -> None:
+        self.__hasher = hasher
+        self.__collector: Optional[Thread] = None
+
         # Create a number of workers
-        self.__workers = [Worker(f'Worker {w}', word_source) for w in range(1, threads+1)]
+        if backend == 'process':
+            # The pipeline is inherited by the worker processes, so the fork start method is required
+            try:
+                context = multiprocessing.get_context('fork')
+            except ValueError:
+                raise ValueError('The process backend is not supported on this platform')
+
+            # Share the claiming state and the match reporting before the workers are forked
+            word_source.share(context)
+            hasher.share(context)
+            self.__workers = [ProcessWorker(f'Worker {w}', word_source, hasher, batch_time, context) for w in range(1, threads+1)]
+            self.__collector = Thread(name='Collector', target=self.__collect, daemon=True)
+        else:
+            self.__workers = [Worker(f'Worker {w}', word_source, hasher, batch_time) for w in range(1, threads+1)]
+
+    def __collect(self) -> None:
+        # Register the matches reported by the worker processes until all of them have finished
+        while any(w.status != 'Finished' for w in self.__workers):
+            self.__hasher.collect(timeout=0.5)
+        self.__hasher.collect(timeout=0)
 
     @property
     def workers(self) -> Tuple[Tuple[str, str, str]]:
         # Get some status information from the worker threads
         return ((w.name, w.status, w.processed) for w in self.__workers)
 
+    @property
+    def running(self) -> bool:
+        # Whether any of the workers has not finished yet
+        return any(w.status != 'Finished' for w in self.__workers)
+
     def start(self):
         logging.info('Starting workpool')
         for worker in self.__workers:
             worker.start()
+        if self.__collector is not None:
+            self.__collector.start()
 
     def stop(self):
         logging.info('Signaling all workers to stop')
         for worker in self.__workers:
             worker.stop()
+
+    def join(self):
+        # Wait for the workers to finish their current batches
+        for worker in self.__workers:
+            worker.join()
+        if self.__collector is not None:
+            self.__collector.join()
+
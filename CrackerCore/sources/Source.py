@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import Callable, Dict, List, Optional, Sequence, Set
+
+from CrackerCore.Hasher import Hasher
+from CrackerCore.variators.Variator import Variator
+
+
+class Source:
+    def __init__(self) -> None:
+        self.__variator: Optional[Variator] = None
+        self.__hasher: Optional[Hasher] = None
+        self.__after: Optional[Callable[[Callable[[], None]], None]] = None
+
+    def use_variator(self, variator: Variator) -> None:
+        # Send all outputs to a variator
+        self.__variator = variator
+
+    def use_hasher(self, hasher: Hasher) -> None:
+        # Send all outputs to a hasher
+        self.__hasher = hasher
+
+    def use_completion(self, after: Callable[[Callable[[], None]], None]) -> None:
+        # Hand the completion of the claimed words to a callback that runs it once their guesses are all checked
+        self.__after = after
+
+    def _int_done(self, complete: Callable[[], None]) -> None:
+        # Mark the claimed words done, the hasher may still have to check their guesses against slow groups
+        if self.__after is not None:
+            self.__after(complete)
+        else:
+            complete()
+
+    def _int_then(self, batch: Set[bytes]) -> None:
+        # Push the guesses into the pipeline
+        if self.__hasher is not None:
+            self.__hasher.check(batch)
+        if self.__variator is not None:
+            self.__variator.endpoint(batch)
+
+    def _int_then_suffixed(self, prefix: bytes, suffixes: Sequence[bytes]) -> None:
+        # Push the prefix followed by each suffix into the pipeline, the hasher reuses the hash state of the prefix
+        if self.__hasher is not None:
+            self.__hasher.check_suffixed(prefix, suffixes)
+        if self.__variator is not None:
+            self.__variator.endpoint({prefix + suffix for suffix in suffixes})
+
+    def push(self, count: int) -> int:
+        # Push about the given number of words into the pipeline and return how many were pushed
+        raise NotImplementedError
+
+    def share(self, context) -> None:
+        raise NotImplementedError
+
+    def sample(self, count: int) -> List[bytes]:
+        # Pick about the given number of words for estimating the keyspace, without claiming them
+        raise NotImplementedError
+
+    def words(self) -> Sequence[bytes]:
+        # The distinct words of the dictionary in order, for combining it with another one
+        raise NotImplementedError
+
+    def checkpoint(self) -> Optional[Dict]:
+        # The state needed to resume the source later, None if the source cannot be resumed
+        return None
+
+    def restore(self, state: Dict) -> bool:
+        # Continue from a checkpoint, returns False if the checkpoint does not fit the source
+        return False
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        # Claim the keyspace through a claimer made for its size and grain, e.g. for one shard of it or from a
+        # coordinator, returns False if the source is not claimed in grains
+        return False
+
+    def start_at(self, offset: int) -> bool:
+        # Skip the given number of bytes at the start of the dictionary, returns False if the source cannot
+        return False
+
+    @property
+    def length(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def progress(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def words_left(self) -> int:
+        raise NotImplementedError
+
+    @property
+    def stall_time(self) -> float:
+        # Time the workers spent waiting for the source to provide words
+        return 0.0
@@ -0,0 +1,94 @@
+import random
+from typing import Callable, Dict, List, Optional, Sequence
+
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.affix import sequence_size
+from CrackerCore.utilities.claim import ClaimCursor, Counter, RangeClaimer
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+
+
+class CombinatorWordSource(Source):
+    __min_grain = 256
+    # The claiming flags take a byte per grain, the grains grow with the keyspace to bound them
+    __max_grains = 1 << 22
+    # Below this many right words per left word copying the hash state does not pay off
+    __min_suffixes = 32
+
+    def __init__(self, left: Sequence[bytes], right: Sequence[bytes]) -> None:
+        super().__init__()
+
+        # Every left word followed by every right word, the index of a guess is left index * right count + right index.
+        # Either side may be a mask table, the guesses are never materialised beyond a batch
+        self.__left = left
+        self.__right = right
+        self.__width = sequence_size(right)
+        self.__total = sequence_size(left) * self.__width
+
+        self.__grain = max(CombinatorWordSource.__min_grain, -(-self.__total // CombinatorWordSource.__max_grains))
+        self.__claimer = RangeClaimer(self.__total, self.__grain)
+        self.__cursor = ClaimCursor()
+        self.__progress = Counter()
+
+    def push(self, count: int) -> int:
+        # A push takes at most the given number of guesses from the grains the worker claimed
+        ranges, finished = self.__cursor.take(self.__claimer, count)
+        if not ranges:
+            raise WordSourceEmpty()
+
+        left, right, width = self.__left, self.__right, self.__width
+        batch = set()
+        for start, end in ranges:
+            # A range covers the right words of one or more left words
+            while start < end:
+                prefix, first = divmod(start, width)
+                last = min(width, first + end - start)
+                if width < CombinatorWordSource.__min_suffixes:
+                    batch.update(left[prefix] + suffix for suffix in right[first:last])
+                else:
+                    self._int_then_suffixed(left[prefix], right[first:last])
+                start += last - first
+        if batch:
+            self._int_then(batch)
+        if finished:
+            self._int_done(lambda: self.__claimer.complete(finished))
+
+        pushed = sum(end - start for start, end in ranges)
+        self.__progress.add(pushed)
+        return pushed
+
+    def sample(self, count: int) -> List[bytes]:
+        picks = (random.randrange(self.__total) for _ in range(count)) if self.__total else ()
+        return [self.__left[idx // self.__width] + self.__right[idx % self.__width] for idx in picks]
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        self.__claimer = make_claimer(self.__total, self.__grain)
+        return True
+
+    def checkpoint(self) -> Optional[Dict]:
+        return {'count': self.__total, 'done': self.__claimer.save(), 'progress': self.__progress.value}
+
+    def restore(self, state: Dict) -> bool:
+        if state.get('count') != self.__total:
+            return False
+        self.__claimer.load(state['done'])
+        self.__progress.add(state['progress'])
+        return True
+
+    def share(self, context) -> None:
+        # Share the claiming state with forked worker processes
+        self.__claimer.share(context)
+        self.__progress.share(context)
+
+    @property
+    def length(self) -> int:
+        return self.__claimer.size
+
+    @property
+    def progress(self) -> int:
+        return self.__progress.value
+
+    @property
+    def words_left(self) -> int:
+        if self.__claimer.exhausted:
+            return 0
+        return max(self.__claimer.size - self.__progress.value, 1)
@@ -0,0 +1,149 @@
+import mmap
+import os
+import random
+import struct
+from array import array
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.claim import Counter, RangeClaimer
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+
+
+class CompiledWordSource(Source):
+    # Header: magic, version, word count, blob size and the number of length buckets
+    __header = struct.Struct('<4sHxxQQQ')
+    __bucket = struct.Struct('<QQQ')
+    __magic = b'CTWD'
+    __version = 1
+    __grain = 16
+
+    def __init__(self, path: Path) -> None:
+        super().__init__()
+
+        # Map the compiled dictionary, nothing is parsed beyond the header
+        with path.open('rb') as dict_file:
+            self.__map = mmap.mmap(dict_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, blob_size, bucket_count = CompiledWordSource.__header.unpack_from(self.__map)
+        if magic != CompiledWordSource.__magic or version != CompiledWordSource.__version:
+            raise ValueError(f'{path} is not a compiled dictionary')
+
+        # The offsets and the buckets are used straight from the mapping
+        offsets_start = CompiledWordSource.__header.size
+        buckets_start = offsets_start + 8 * (count + 1)
+        self.__blob_start = buckets_start + CompiledWordSource.__bucket.size * bucket_count
+        self.__offsets = memoryview(self.__map)[offsets_start:buckets_start].cast('Q')
+        buckets = CompiledWordSource.__bucket.iter_unpack(self.__map[buckets_start:self.__blob_start])
+        self.__buckets = {length: (first, last) for length, first, last in buckets}
+        self.__wordcount = count
+
+        # The words are claimed in small index ranges
+        self.__claimer = RangeClaimer(count, CompiledWordSource.__grain)
+        self.__progress = Counter()
+
+    @staticmethod
+    def compile(source: Path, target: Path, by_length: bool = False) -> int:
+        # Deduplicate the words of a dictionary, keeping the first occurence, and drop blank lines
+        with source.open('rb') as word_file:
+            words = list(dict.fromkeys(line.rstrip(b'\r\n') for line in word_file))
+        words = [word for word in words if word]
+        if by_length:
+            words.sort(key=len)
+
+        # Offsets of each word within the blob, the last entry marks the end of the blob
+        offsets = array('Q', [0])
+        for word in words:
+            offsets.append(offsets[-1] + len(word))
+
+        # Ranges of word indices sharing the same length
+        buckets: List[Tuple[int, int, int]] = []
+        if by_length:
+            for idx, word in enumerate(words):
+                if buckets and buckets[-1][0] == len(word):
+                    buckets[-1] = (len(word), buckets[-1][1], idx + 1)
+                else:
+                    buckets.append((len(word), idx, idx + 1))
+
+        temp_path = target.with_name(target.name + '.tmp')
+        with temp_path.open('wb') as dict_file:
+            dict_file.write(CompiledWordSource.__header.pack(CompiledWordSource.__magic, CompiledWordSource.__version,
+                                                             len(words), offsets[-1], len(buckets)))
+            dict_file.write(offsets.tobytes())
+            for bucket in buckets:
+                dict_file.write(CompiledWordSource.__bucket.pack(*bucket))
+            for word in words:
+                dict_file.write(word)
+        os.replace(temp_path, target)
+
+        return len(words)
+
+    @staticmethod
+    def supports(path: Path) -> bool:
+        return path.suffix == '.ctdict'
+
+    def push(self, count: int) -> int:
+        # Claim ranges of words
+        ranges = self.__claimer.claim(count)
+        if not ranges:
+            raise WordSourceEmpty()
+
+        # Slice the words out of the blob using the precomputed offsets
+        blob, words = self.__blob_start, self.__map
+        batch = set()
+        for start, end in ranges:
+            offsets = self.__offsets[start:end+1]
+            batch.update(words[blob+offsets[idx]:blob+offsets[idx+1]] for idx in range(len(offsets) - 1))
+        self._int_then(batch)
+        self._int_done(lambda: self.__claimer.complete(ranges))
+
+        claimed = sum(end - start for start, end in ranges)
+        self.__progress.add(claimed)
+        return claimed
+
+    def sample(self, count: int) -> List[bytes]:
+        blob, words = self.__blob_start, self.__map
+        picks = (random.randrange(self.__wordcount) for _ in range(count)) if self.__wordcount else ()
+        return [words[blob+self.__offsets[idx]:blob+self.__offsets[idx+1]] for idx in picks]
+
+    def words(self) -> List[bytes]:
+        blob, words, offsets = self.__blob_start, self.__map, self.__offsets
+        return [words[blob+offsets[idx]:blob+offsets[idx+1]] for idx in range(self.__wordcount)]
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        self.__claimer = make_claimer(self.__wordcount, CompiledWordSource.__grain)
+        return True
+
+    def checkpoint(self) -> Optional[Dict]:
+        return {'count': self.__wordcount, 'done': self.__claimer.save(), 'progress': self.__progress.value}
+
+    def restore(self, state: Dict) -> bool:
+        if state.get('count') != self.__wordcount:
+            return False
+        self.__claimer.load(state['done'])
+        self.__progress.add(state['progress'])
+        return True
+
+    def share(self, context) -> None:
+        # Share the claiming state with forked worker processes
+        self.__claimer.share(context)
+        self.__progress.share(context)
+
+    @property
+    def buckets(self) -> Dict[int, Tuple[int, int]]:
+        # Word index ranges by word length, if the dictionary was compiled sorted by length
+        return self.__buckets
+
+    @property
+    def length(self) -> int:
+        return self.__claimer.size
+
+    @property
+    def progress(self) -> int:
+        return self.__progress.value
+
+    @property
+    def words_left(self) -> int:
+        if self.__claimer.exhausted:
+            return 0
+        return max(self.__claimer.size - self.__progress.value, 1)
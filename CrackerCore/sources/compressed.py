@@ -0,0 +1,182 @@
+import bz2
+import gzip
+import logging
+import lzma
+import queue
+from itertools import islice
+from multiprocessing import RawValue
+from pathlib import Path
+from threading import Lock, Thread
+from time import perf_counter
+from typing import List
+
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.claim import Counter
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+
+
+class CompressedWordSource(Source):
+    __openers = {
+        '.gz': lambda raw_file: gzip.GzipFile(fileobj=raw_file),
+        '.xz': lzma.LZMAFile,
+        '.lzma': lzma.LZMAFile,
+        '.bz2': bz2.BZ2File,
+    }
+    __block_size = 1 << 20
+
+    def __init__(self, path: Path, batch_size: int = 100, read_ahead: int = 256) -> None:
+        super().__init__()
+        self.__path = path
+        self.__batch_size = batch_size
+        self.__lock = Lock()
+        self.__started = False
+
+        # The decompressed batches are buffered in a bounded queue filled by a background thread
+        self.__queue = queue.Queue(maxsize=read_ahead)
+        self.__size = max(path.stat().st_size, 1)
+
+        # Estimate the word count from the compression ratio at the start of the file until the reader is going
+        with path.open('rb') as raw_file:
+            with CompressedWordSource.__openers[path.suffix](raw_file) as word_file:
+                sample = word_file.read(CompressedWordSource.__block_size)
+                self.__sample_lines = len(sample.splitlines())
+                self.__sample_bytes = max(raw_file.tell(), 1)
+
+        # The counters are kept in shared memory so that they can be shared with worker processes
+        self.__consumed = RawValue('q', 0)
+        self.__read = RawValue('q', 0)
+        self.__exhausted = RawValue('b', 0)
+        self.__progress = Counter()
+        self.__stalls = Counter()
+        self.__stall_time = Counter()
+
+    @staticmethod
+    def supports(path: Path) -> bool:
+        return path.suffix in CompressedWordSource.__openers
+
+    def sample(self, count: int) -> List[bytes]:
+        # The stream cannot be read at random, the words are taken from the start of the dictionary
+        with self.__path.open('rb') as raw_file:
+            with CompressedWordSource.__openers[self.__path.suffix](raw_file) as word_file:
+                return [line.rstrip(b'\r\n') for line in islice(word_file, count) if line.strip()]
+
+    def words(self) -> List[bytes]:
+        with self.__path.open('rb') as raw_file:
+            with CompressedWordSource.__openers[self.__path.suffix](raw_file) as word_file:
+                return list(filter(None, dict.fromkeys(line.rstrip(b'\r\n') for line in word_file)))
+
+    def __start(self) -> None:
+        # Start the decompression once, in the process which owns the file
+        with self.__lock:
+            if not self.__started:
+                self.__started = True
+                Thread(name='Reader', target=self.__read_ahead, daemon=True).start()
+
+    def __read_ahead(self) -> None:
+        try:
+            self.__decompress()
+        except Exception:
+            logging.exception('Failed to read the compressed dictionary')
+        finally:
+            # Mark the end of the stream
+            self.__consumed.value = self.__size
+            self.__queue.put(None)
+
+    def __decompress(self) -> None:
+        with self.__path.open('rb') as raw_file:
+            with CompressedWordSource.__openers[self.__path.suffix](raw_file) as word_file:
+                tail = b''
+                batch: List[bytes] = []
+                while True:
+                    block = word_file.read(CompressedWordSource.__block_size)
+                    if not block:
+                        break
+
+                    # Split the block into words, the last line may continue in the next block
+                    lines = (tail + block).split(b'\n')
+                    tail = lines.pop()
+
+                    for line in lines:
+                        batch.append(line.rstrip(b'\r'))
+                        if len(batch) >= self.__batch_size:
+                            self.__queue.put(batch)
+                            batch = []
+
+                    # Track the compressed position for the word count estimate
+                    self.__consumed.value = raw_file.tell()
+                    self.__read.value += len(lines)
+
+                if tail:
+                    batch.append(tail.rstrip(b'\r'))
+                    self.__read.value += 1
+                if batch:
+                    self.__queue.put(batch)
+        logging.info('The compressed dictionary has been read')
+
+    def push(self, count: int) -> int:
+        if self.__exhausted.value:
+            raise WordSourceEmpty()
+        self.__start()
+
+        # Take prepared batches until the requested count is reached or the read-ahead runs dry
+        words: List[bytes] = []
+        while len(words) < count:
+            try:
+                batch = self.__queue.get_nowait()
+            except queue.Empty:
+                if words:
+                    break
+                # Wait only if the decompression is falling behind
+                start = perf_counter()
+                batch = self.__queue.get()
+                self.__stalls.add(1)
+                self.__stall_time.add(int((perf_counter() - start) * 1e6))
+
+            if batch is None:
+                # Leave the end marker for the other workers
+                self.__exhausted.value = 1
+                self.__queue.put(None)
+                break
+            words.extend(batch)
+
+        if not words:
+            raise WordSourceEmpty()
+
+        self._int_then(set(words))
+        self.__progress.add(len(words))
+        return len(words)
+
+    def share(self, context) -> None:
+        # Worker processes drain a queue filled by the reader thread in this process
+        self.__lock = context.Lock()
+        self.__queue = context.Queue(maxsize=self.__queue.maxsize)
+        self.__progress.share(context)
+        self.__stalls.share(context)
+        self.__stall_time.share(context)
+        self.__start()
+
+    @property
+    def length(self) -> int:
+        # An estimate of the word count based on the compressed bytes read so far
+        consumed, read = self.__consumed.value, self.__read.value
+        if consumed:
+            return round(read * self.__size / consumed)
+        return round(self.__sample_lines * self.__size / self.__sample_bytes)
+
+    @property
+    def progress(self) -> int:
+        return self.__progress.value
+
+    @property
+    def words_left(self) -> int:
+        if self.__exhausted.value:
+            return 0
+        return max(self.length - self.__progress.value, 1)
+
+    @property
+    def stalls(self) -> int:
+        return self.__stalls.value
+
+    @property
+    def stall_time(self) -> float:
+        return self.__stall_time.value / 1e6
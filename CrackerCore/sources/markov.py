@@ -0,0 +1,137 @@
+import logging
+import queue
+from itertools import chain, islice
+from multiprocessing import RawValue
+from threading import Lock, Thread
+from time import perf_counter
+from typing import List, Optional
+
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.claim import Counter
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+from CrackerCore.utilities.markov import MarkovModel
+
+
+class MarkovWordSource(Source):
+    def __init__(self, model: MarkovModel, limit: int, follows: Optional['MarkovWordSource'] = None,
+                 batch_size: int = 100, read_ahead: int = 256) -> None:
+        super().__init__()
+        self.__model = model
+        self.__limit = limit
+        self.__batch_size = batch_size
+        self.__lock = Lock()
+        self.__started = False
+        self.__shared = False
+
+        # Sources of the same model, e.g. of the tiers of a pipeline, enumerate the guesses one after another:
+        # a source that follows another starts once the other one has generated its guesses
+        self.__follows = follows
+        self.__successor: Optional[MarkovWordSource] = None
+        if follows is not None:
+            follows.__successor = self
+
+        # The guesses are enumerated by a background thread in the order of their probability,
+        # the bounded queue keeps the memory use flat however many guesses there are
+        self.__queue = queue.Queue(maxsize=read_ahead)
+        self.__generated = RawValue('q', 0)
+        self.__exhausted = RawValue('b', 0)
+        self.__progress = Counter()
+        self.__stall_time = Counter()
+
+    def __guesses(self):
+        return islice(chain.from_iterable(self.__model.candidates()), self.__limit)
+
+    def sample(self, count: int) -> List[bytes]:
+        # The most likely guesses, which are the first ones
+        return list(islice(self.__guesses(), count))
+
+    def words(self) -> List[bytes]:
+        return list(self.__guesses())
+
+    def __start(self) -> None:
+        # Start the enumeration once, in the process which owns the model, the worker processes only drain the queue
+        with self.__lock:
+            if not self.__started:
+                self.__started = True
+                Thread(name='Markov', target=self.__generate, daemon=True).start()
+
+    def __generate(self) -> None:
+        try:
+            batch: List[bytes] = []
+            for guess in self.__guesses():
+                batch.append(guess)
+                if len(batch) >= self.__batch_size:
+                    self.__queue.put(batch)
+                    self.__generated.value += len(batch)
+                    batch = []
+            if batch:
+                self.__queue.put(batch)
+                self.__generated.value += len(batch)
+        except Exception:
+            logging.exception('Failed to generate the Markov guesses')
+        finally:
+            # Mark the end of the stream
+            self.__queue.put(None)
+        logging.info(f'Generated {self.__generated.value} Markov guesses')
+        if self.__successor is not None:
+            self.__successor.__start()
+
+    def push(self, count: int) -> int:
+        if self.__exhausted.value:
+            raise WordSourceEmpty()
+        if not self.__shared:
+            self.__start()
+
+        # Take prepared batches until the requested count is reached or the queue runs dry
+        words: List[bytes] = []
+        while len(words) < count:
+            try:
+                batch = self.__queue.get_nowait()
+            except queue.Empty:
+                if words:
+                    break
+                start = perf_counter()
+                batch = self.__queue.get()
+                self.__stall_time.add(int((perf_counter() - start) * 1e6))
+
+            if batch is None:
+                # Leave the end marker for the other workers
+                self.__exhausted.value = 1
+                self.__queue.put(None)
+                break
+            words.extend(batch)
+
+        if not words:
+            raise WordSourceEmpty()
+
+        self._int_then(set(words))
+        self.__progress.add(len(words))
+        return len(words)
+
+    def share(self, context) -> None:
+        # Worker processes drain a queue filled by the enumeration thread in this process
+        self.__lock = context.Lock()
+        self.__queue = context.Queue(maxsize=self.__queue.maxsize)
+        self.__progress.share(context)
+        self.__stall_time.share(context)
+        self.__shared = True
+        if self.__follows is None:
+            self.__start()
+
+    @property
+    def length(self) -> int:
+        return self.__limit
+
+    @property
+    def progress(self) -> int:
+        return self.__progress.value
+
+    @property
+    def words_left(self) -> int:
+        if self.__exhausted.value:
+            return 0
+        return max(self.__limit - self.__progress.value, 1)
+
+    @property
+    def stall_time(self) -> float:
+        return self.__stall_time.value / 1e6
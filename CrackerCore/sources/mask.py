@@ -0,0 +1,130 @@
+import random
+import string
+from typing import Callable, Dict, List, Optional, Tuple
+
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.affix import AffixTable, ChainTable, ProductTable
+from CrackerCore.utilities.claim import ClaimCursor, Counter, RangeClaimer
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+
+
+def parse_mask(mask: str, charsets: Optional[Dict[str, str]] = None) -> List[Tuple[bytes, ...]]:
+    # Turn a mask like ?u?l?l?d into the symbols of each position, ?1 to ?4 refer to custom charsets
+    # which may use the built in ones themselves, ?? is a literal question mark.
+    # A symbol is a character in UTF-8, so a character outside of ASCII stays a single symbol
+    builtin = {
+        'l': string.ascii_lowercase,
+        'u': string.ascii_uppercase,
+        'd': string.digits,
+        'h': '0123456789abcdef',
+        'H': '0123456789ABCDEF',
+        's': ' !"#$%&\'()*+,-./:;<=>?@[\\]^_`{|}~',
+    }
+    builtin['a'] = builtin['l'] + builtin['u'] + builtin['d'] + builtin['s']
+
+    def expand(text: str, named: Dict[str, Tuple[bytes, ...]]) -> List[Tuple[bytes, ...]]:
+        positions, idx = [], 0
+        while idx < len(text):
+            if text[idx] != '?':
+                positions.append((text[idx].encode('utf8'),))
+                idx += 1
+                continue
+            if idx + 1 == len(text):
+                raise ValueError(f'The mask {text} ends with an unfinished ?')
+            name = text[idx+1]
+            if name == '?':
+                positions.append((b'?',))
+            elif name == 'b':
+                positions.append(tuple(bytes((value,)) for value in range(256)))
+            elif name in named:
+                positions.append(named[name])
+            else:
+                raise ValueError(f'Unknown charset ?{name} in {text}')
+            idx += 2
+        return positions
+
+    named = {name: tuple(char.encode('utf8') for char in symbols) for name, symbols in builtin.items()}
+    for name, text in sorted((charsets or {}).items()):
+        # A custom charset is the deduplicated union of its parts
+        named[name] = tuple(dict.fromkeys(symbol for position in expand(text, named) for symbol in position))
+    return expand(mask, named)
+
+
+class MaskWordSource(Source):
+    __min_grain = 256
+    # The claiming flags take a byte per grain, the grains grow with the keyspace to bound them
+    __max_grains = 1 << 22
+
+    def __init__(self, mask: str, charsets: Optional[Dict[str, str]] = None,
+                 increment: Optional[Tuple[int, int]] = None) -> None:
+        super().__init__()
+
+        # The keyspace is the product of the position charsets, with increments the shorter masks come first
+        positions = parse_mask(mask, charsets)
+        lengths = range(increment[0], min(increment[1], len(positions)) + 1) if increment else [len(positions)]
+        self.__table = ChainTable([ProductTable(positions[:length]) for length in lengths if length > 0])
+        self.__total = self.__table.size
+
+        # The candidates are claimed by index and generated straight from it
+        self.__grain = max(MaskWordSource.__min_grain, -(-self.__total // MaskWordSource.__max_grains))
+        self.__claimer = RangeClaimer(self.__total, self.__grain)
+        self.__progress = Counter()
+        self.__cursor = ClaimCursor()
+
+    def push(self, count: int) -> int:
+        # A push takes at most the given number of words from the grains the worker claimed
+        ranges, finished = self.__cursor.take(self.__claimer, count)
+        if not ranges:
+            raise WordSourceEmpty()
+
+        batch = set()
+        for start, end in ranges:
+            batch.update(self.__table[start:end])
+        self._int_then(batch)
+        if finished:
+            self._int_done(lambda: self.__claimer.complete(finished))
+
+        pushed = sum(end - start for start, end in ranges)
+        self.__progress.add(pushed)
+        return pushed
+
+    def sample(self, count: int) -> List[bytes]:
+        picks = (random.randrange(self.__total) for _ in range(count)) if self.__total else ()
+        return [self.__table[idx] for idx in picks]
+
+    def words(self) -> AffixTable:
+        # The words are generated as they are read
+        return self.__table
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        self.__claimer = make_claimer(self.__total, self.__grain)
+        return True
+
+    def checkpoint(self) -> Optional[Dict]:
+        return {'count': self.__total, 'done': self.__claimer.save(), 'progress': self.__progress.value}
+
+    def restore(self, state: Dict) -> bool:
+        if state.get('count') != self.__total:
+            return False
+        self.__claimer.load(state['done'])
+        self.__progress.add(state['progress'])
+        return True
+
+    def share(self, context) -> None:
+        # Share the claiming state with forked worker processes
+        self.__claimer.share(context)
+        self.__progress.share(context)
+
+    @property
+    def length(self) -> int:
+        return self.__claimer.size
+
+    @property
+    def progress(self) -> int:
+        return self.__progress.value
+
+    @property
+    def words_left(self) -> int:
+        if self.__claimer.exhausted:
+            return 0
+        return max(self.__claimer.size - self.__progress.value, 1)
@@ -0,0 +1,100 @@
+import logging
+import os
+from multiprocessing import RawValue
+from threading import Lock, local
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from CrackerCore.Hasher import Hasher
+from CrackerCore.sources.Source import Source
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+from CrackerCore.variators.Variator import Variator
+
+
+class TieredSource(Source):
+    def __init__(self, tiers: List[Tuple[str, Source, Union[Source, Variator]]]) -> None:
+        # Runs the dictionary breadth first: every tier is a pass over the whole dictionary through the stages
+        # before its own, of which only the last one is hashed, and the tiers run one after another.
+        # A tier is given by its name, its word source and the stage that is hashed
+        super().__init__()
+        self.__tiers = tiers
+        self.__tier = RawValue('q', 0)
+        self.__lock = Lock()
+        self.__worker_tier = local()
+
+    def use_hasher(self, hasher: Hasher) -> None:
+        for _, _, stage in self.__tiers:
+            stage.use_hasher(hasher)
+
+    def use_completion(self, after: Callable) -> None:
+        for _, source, _ in self.__tiers:
+            source.use_completion(after)
+
+    def push(self, count: int) -> int:
+        # Every worker goes through the tiers in order and only moves on once a tier has no words left for it,
+        # so that the words it has claimed in a tier are all pushed. A resumed run starts from the first tier,
+        # the words completed before are skipped
+        owner, tier = getattr(self.__worker_tier, 'tier', (None, 0))
+        tier = tier if owner == os.getpid() else 0
+        while tier < len(self.__tiers):
+            try:
+                return self.__tiers[tier][1].push(count)
+            except WordSourceEmpty:
+                tier += 1
+                self.__worker_tier.tier = (os.getpid(), tier)
+                # The first worker to run out of words moves the job on to the next tier
+                with self.__lock:
+                    if self.__tier.value < tier:
+                        self.__tier.value = tier
+                        if tier < len(self.__tiers):
+                            logging.info(f'Moving on to tier {tier + 1} of {len(self.__tiers)}: {self.__tiers[tier][0]}')
+        raise WordSourceEmpty()
+
+    def sample(self, count: int) -> List[bytes]:
+        return self.__tiers[0][1].sample(count)
+
+    def use_claimer(self, make_claimer: Callable) -> bool:
+        return all([source.use_claimer(make_claimer) for _, source, _ in self.__tiers])
+
+    def start_at(self, offset: int) -> bool:
+        return all([source.start_at(offset) for _, source, _ in self.__tiers])
+
+    def checkpoint(self) -> Optional[Dict]:
+        states = [source.checkpoint() for _, source, _ in self.__tiers]
+        if any(state is None for state in states):
+            return None
+        return {'tier': self.__tier.value, 'tiers': states}
+
+    def restore(self, state: Dict) -> bool:
+        if len(state.get('tiers', ())) != len(self.__tiers):
+            return False
+        if not all([source.restore(tier) for (_, source, _), tier in zip(self.__tiers, state['tiers'])]):
+            return False
+        self.__tier.value = state['tier']
+        return True
+
+    def share(self, context) -> None:
+        self.__lock = context.Lock()
+        for _, source, _ in self.__tiers:
+            source.share(context)
+
+    @property
+    def tier(self) -> str:
+        # The name of the current tier
+        tier = self.__tier.value
+        return self.__tiers[tier][0] if tier < len(self.__tiers) else 'done'
+
+    @property
+    def length(self) -> int:
+        return sum(source.length for _, source, _ in self.__tiers)
+
+    @property
+    def progress(self) -> int:
+        return sum(source.progress for _, source, _ in self.__tiers)
+
+    @property
+    def words_left(self) -> int:
+        return sum(source.words_left for _, source, _ in self.__tiers[self.__tier.value:])
+
+    @property
+    def stall_time(self) -> float:
+        return sum(source.stall_time for _, source, _ in self.__tiers)
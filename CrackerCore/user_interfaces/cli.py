@@ -1,15 +1,17 @@
 import logging
 import sys
 from pathlib import Path
-from threading import Event
 from time import time
 from typing import Dict
 
-from CrackerCore.HashGroup import HashGroup
+from CrackerCore.Checkpoint import Checkpoint
+from CrackerCore.Coordinator import RemoteClaimer, parse_address
 from CrackerCore.Hasher import Hasher
-from CrackerCore.WordSource import WordSource
+from CrackerCore.Ledger import Ledger
+from CrackerCore.Potfile import Potfile
 from CrackerCore.WorkerPool import WorkerPool
-from CrackerCore.utilities.pipeline import build_pipeline
+from CrackerCore.utilities.claim import RangeClaimer
+from CrackerCore.utilities.pipeline import build_hash_group, build_pipeline, build_word_source
 from CrackerCore.utilities.utility import export_results
 
 
@@ -22,21 +24,66 @@ def cli(config: Dict) -> None:
     logging.getLogger().addHandler(streamLogger)
     logging.getLogger().setLevel(logging.INFO)
     
-    hasher = Hasher('sha1')
+    hasher = Hasher()
     logging.info(f'Created a hasher')
 
+    #
+    # Record the matches in the potfile
+    potfile = Potfile(Path(config['potfile'])) if config['potfile'] else None
+    if potfile is not None:
+        hasher.use_potfile(potfile)
+        logging.info(f'Using the potfile {config["potfile"]}')
+
+    #
+    # Take the work from a coordinator and send the matches back to it
+    remote = RemoteClaimer(parse_address(config['coordinator'])) if config['coordinator'] else None
+
+    def report_match(set_name: str, pw: str, pw_hash: str) -> None:
+        logging.info(f'A match was registered in {set_name}: {pw} - {pw_hash}')
+        if remote is not None:
+            remote.report(set_name, pw, pw_hash)
+
     #
     # Load hashes to crack
+    hash_groups = []
     for hash_set in filter(lambda e: e['key'] in config['selected_hash_sets'], config['hash_sets']):
-        new_hash_set = HashGroup(hash_set['title'], Path(hash_set['path']))
-        new_hash_set.notify_on_match(lambda set_name, pw, pw_hash: logging.info(f'A match was registered in {set_name}: {pw} - {pw_hash}'))
+        new_hash_set = build_hash_group(hash_set)
+        new_hash_set.notify_on_match(report_match)
         hasher.add_group(new_hash_set)
-        logging.info(f'Enabled hash set {new_hash_set.title}')
+        hash_groups.append((hash_set, new_hash_set))
+        logging.info(f'Enabled {new_hash_set.algorithm} hash set {new_hash_set.title}')
+        if potfile is not None:
+            logging.info(f'{potfile.premark(new_hash_set)} hashes of {new_hash_set.title} were found in the potfile')
     
     #
     # Load the dictionary
-    word_source = WordSource(Path(config['dict']['path']))
-    logging.info(f'Created word source {config["dict"]["key"]} with {word_source.length} words')
+    word_source = build_word_source(config['dict'], config['pipeline'])
+    logging.info(f'Created word source {config["dict"]["key"]} with an estimated {word_source.length} words')
+
+    #
+    # Only go through a shard of the dictionary or the ranges the coordinator hands out
+    if remote is not None or config['shard'] != (0, 1):
+        make_claimer = remote.attach if remote is not None else lambda total, grain: RangeClaimer(total, grain, config['shard'])
+        if not word_source.use_claimer(make_claimer):
+            raise ValueError(f'The dictionary {config["dict"]["key"]} cannot be split between nodes')
+        logging.info(f'Claiming the dictionary from {config["coordinator"]}' if remote is not None
+                     else f'Going through shard {config["shard"][0]}/{config["shard"][1]} of the dictionary')
+
+    #
+    # Skip the words and the hashes that earlier runs have tried together already
+    ledger = Ledger(Path(config['ledger'])) if config['ledger'] else None
+    if ledger is not None:
+        start = ledger.plan(Path(config['dict']['path']), config['pipeline'], hash_groups)
+        if start and word_source.start_at(start):
+            logging.info(f'Starting from byte {start} of the dictionary, the words before it have been tried already')
+
+    #
+    # Continue an interrupted job from its checkpoint
+    if config['resume'] is not None:
+        resumed, restored = Checkpoint.restore(config['resume'], word_source, [group for _, group in hash_groups])
+        logging.info(f'Restored {restored} matches from the checkpoint')
+        if not resumed:
+            logging.warning('The dictionary cannot be resumed from the checkpoint, it is processed from the start')
 
     #
     # Setup variators to generate variations of the dictionary words
@@ -45,25 +92,57 @@ def cli(config: Dict) -> None:
 
     #
     # Setup multithreading
-    worker_pool = WorkerPool(config['threads'], pipeline)
-    logging.info(f'Created a worker pool with {config["threads"]} workers')
+    worker_pool = WorkerPool(config['threads'], pipeline, hasher, config['backend'], config['batch_time'])
+    logging.info(f'Created a worker pool with {config["threads"]} {config["backend"]} workers')
 
     #
     # Start the process
     start_time = time()
     worker_pool.start()
+    aborted = False
+
+    #
+    # Write checkpoints in the background so that a long job can be resumed
+    checkpoint = Checkpoint(Path(config['checkpoint']), config, word_source, hasher, config['checkpoint_interval']) \
+        if config['checkpoint'] else None
+    if checkpoint is not None:
+        checkpoint.start()
 
     #
     # Keep updating the progress onto the console while there still are words to process
     try:
-        stop = Event()
-        while not stop.wait(timeout=5):
-            logging.info(f'Running hashes: {word_source.progress} words out of {word_source.length} tested, {word_source.words_left} left. Recent word: {hasher.recent_word}')
-            if not word_source.words_left:
-                stop.set()
+        while not hasher.wait_exhausted(timeout=5) and word_source.words_left and worker_pool.running:
+            logging.info(f'Running hashes: {word_source.progress} words out of {word_source.length} tested, {word_source.words_left} left, waited {word_source.stall_time:.1f}s for words. Recent word: {hasher.recent_word}')
+
+        # Workers that stopped on an error leave the rest of the words untested
+        if not worker_pool.running and not hasher.exhausted and word_source.words_left:
+            logging.error('All workers have stopped before the words were tested, see the log for the cause')
+            aborted = True
+
+        # There is no need to go through the rest of the words once every hash is cracked
+        if hasher.exhausted:
+            logging.info('No hashes are left to crack, stopping early')
+            worker_pool.stop()
     except KeyboardInterrupt:
         logging.info("Process was aborted")
         worker_pool.stop()
+        aborted = True
+
+    #
+    # Let the workers finish their current batches so that no matches are lost
+    worker_pool.join()
+    if potfile is not None:
+        potfile.close()
+    if config['pipeline'].get('dedup'):
+        logging.info(f'Skipped hashing {hasher.skipped} duplicate candidates')
+
+    #
+    # A job that went through the whole dictionary or cracked everything does not need to be repeated
+    completed = not aborted and (hasher.exhausted or not word_source.words_left)
+    if ledger is not None and completed:
+        ledger.record()
+    if checkpoint is not None:
+        checkpoint.stop(completed)
 
     #
     # Export the discovered hashes
@@ -0,0 +1,45 @@
+from pathlib import Path
+from typing import Dict
+
+from CrackerCore.Potfile import Potfile
+from CrackerCore.utilities.claim import RangeClaimer
+from CrackerCore.utilities.keyspace import format_duration, measure_hash_rate, sample_stages
+from CrackerCore.utilities.pipeline import build_hash_group, build_variators, build_word_source
+
+
+def estimate(config: Dict, sample_size: int = 1000) -> None:
+    #
+    # Load the hashes, the ones in the potfile do not need to be cracked anymore
+    potfile = Potfile(Path(config['potfile'])) if config['potfile'] else None
+    groups = []
+    for hash_set in filter(lambda e: e['key'] in config['selected_hash_sets'], config['hash_sets']):
+        group = build_hash_group(hash_set)
+        if potfile is not None:
+            potfile.premark(group)
+        groups.append(group)
+
+    #
+    # Follow a sample of the dictionary through the pipeline
+    word_source = build_word_source(config['dict'])
+    word_source.use_claimer(lambda total, grain: RangeClaimer(total, grain, config['shard']))
+    variators = build_variators(config['pipeline'])
+    words = word_source.sample(sample_size)
+    stages = sample_stages(words, word_source.length, variators)
+
+    print(f'Keyspace estimate from {len(words)} sampled words of {config["dict"]["key"]}:\n')
+    print(f'{"Stage":24} {"Per input":>12} {"Candidates":>20}  Hashed')
+    hash_sources = config['pipeline']['hash_sources']
+    print(f'{"0 dictionary":24} {"":>12} {word_source.length:>20,}  {"yes" if 0 in hash_sources else "no"}')
+    total = word_source.length if 0 in hash_sources else 0
+    for idx, (variator, (fanout, produced)) in enumerate(zip(config['pipeline']['variators'], stages), start=1):
+        print(f'{f"{idx} " + " ".join(variator):24} {fanout:>12,.1f} {round(produced):>20,}  {"yes" if idx in hash_sources else "no"}')
+        if idx in hash_sources:
+            total += produced
+
+    #
+    # Predict the runtime from the measured hash rate, thread workers share one interpreter and do not add up
+    rate = measure_hash_rate(groups, words)
+    workers = config['threads'] if config['backend'] == 'process' else 1
+    print(f'\nCandidates to hash:  {round(total):,}')
+    print(f'Hash rate:           {rate:,.0f} guesses/s per worker, {len(groups)} hash sets')
+    print(f'Estimated runtime:   {format_duration(total / (rate * workers))} with {config["threads"]} {config["backend"]} workers')
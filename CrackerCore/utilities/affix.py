@@ -0,0 +1,140 @@
+from copy import copy
+from itertools import product
+from typing import Iterator, Optional, Sequence, Union
+
+
+class AffixTable:
+    # Generated pre-/postfixes or words addressed by index, nothing is materialised: an affix is computed from its
+    # index and a range of them is generated in blocks, a slice of a table is a view over a part of it
+    def __init__(self) -> None:
+        self.__start = 0
+        self.__stop: Optional[int] = None
+
+    def _int_size(self) -> int:
+        raise NotImplementedError
+
+    def _int_affix(self, index: int) -> bytes:
+        raise NotImplementedError
+
+    def _int_range(self, start: int, stop: int) -> Iterator[bytes]:
+        raise NotImplementedError
+
+    def __bounds(self):
+        return self.__start, self._int_size() if self.__stop is None else self.__stop
+
+    @property
+    def size(self) -> int:
+        # The number of affixes, len() is limited to sys.maxsize while a table may be far larger
+        start, stop = self.__bounds()
+        return stop - start
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __bool__(self) -> bool:
+        return self.size > 0
+
+    def __getitem__(self, key: Union[int, slice]):
+        start, stop = self.__bounds()
+        if isinstance(key, slice):
+            selected = range(start, stop)[key]
+            if selected.step != 1:
+                raise ValueError('Affix tables can only be sliced contiguously')
+            view = copy(self)
+            view.__start, view.__stop = selected.start, max(selected.start, selected.stop)
+            return view
+        return self._int_affix(range(start, stop)[key])
+
+    def __iter__(self) -> Iterator[bytes]:
+        return self._int_range(*self.__bounds())
+
+
+class ProductTable(AffixTable):
+    def __init__(self, positions: Sequence[Union[bytes, Sequence[bytes]]]) -> None:
+        # Every combination of one symbol per position in odometer order, the last position changes fastest.
+        # The symbols of a position are its bytes or, for symbols longer than a byte, given one by one
+        super().__init__()
+        self.__positions = [tuple(symbols[i:i+1] for i in range(len(symbols))) if isinstance(symbols, bytes)
+                            else tuple(symbols) for symbols in positions]
+        # The number of combinations of the last positions, from none of them to all of them
+        self.__weights = [1]
+        for symbols in reversed(self.__positions):
+            self.__weights.append(self.__weights[-1] * len(symbols))
+
+    def _int_size(self) -> int:
+        return self.__weights[-1]
+
+    def __head(self, value: int, width: int) -> bytes:
+        # The symbols of the first positions at the given index of their combinations, the symbols are the digits
+        digits = []
+        for symbols in reversed(self.__positions[:width]):
+            value, digit = divmod(value, len(symbols))
+            digits.append(symbols[digit])
+        return b''.join(reversed(digits))
+
+    def _int_affix(self, index: int) -> bytes:
+        return self.__head(index, len(self.__positions))
+
+    def _int_range(self, start: int, stop: int) -> Iterator[bytes]:
+        # Split the range into blocks that share their leading symbols, each block is a product over the rest
+        length, weights = len(self.__positions), self.__weights
+        while start < stop:
+            free = 0
+            while free < length and start % weights[free + 1] == 0 and start + weights[free + 1] <= stop:
+                free += 1
+            head = self.__head(start // weights[free], length - free)
+            yield from map(b''.join, product((head,), *self.__positions[length - free:]))
+            start += weights[free]
+
+
+class ChainTable(AffixTable):
+    def __init__(self, tables: Sequence[AffixTable]) -> None:
+        # The affixes of the tables one after another
+        super().__init__()
+        self.__tables = list(tables)
+
+    def _int_size(self) -> int:
+        return sum(table.size for table in self.__tables)
+
+    def _int_affix(self, index: int) -> bytes:
+        for table in self.__tables:
+            if index < table.size:
+                return table[index]
+            index -= table.size
+        raise IndexError(index)
+
+    def _int_range(self, start: int, stop: int) -> Iterator[bytes]:
+        offset = 0
+        for table in self.__tables:
+            size = table.size
+            if start < offset + size and offset < stop:
+                yield from table[max(start - offset, 0):min(stop - offset, size)]
+            offset += size
+
+
+class SequenceTable(ChainTable):
+    def __init__(self, symbols: bytes, count: int, shortest: int = 1) -> None:
+        # All sequences of shortest to count symbols, the shorter ones first and each length in lexicographic order
+        super().__init__([ProductTable([symbols] * length) for length in range(shortest, count + 1)])
+
+
+class RangeTable(AffixTable):
+    def __init__(self, first: int, last: int) -> None:
+        # The numbers from first to last
+        super().__init__()
+        self.__first = first
+        self.__last = last
+
+    def _int_size(self) -> int:
+        return max(self.__last - self.__first + 1, 0)
+
+    def _int_affix(self, index: int) -> bytes:
+        return b'%d' % (self.__first + index)
+
+    def _int_range(self, start: int, stop: int) -> Iterator[bytes]:
+        return map(b'%d'.__mod__, range(self.__first + start, self.__first + stop))
+
+
+def sequence_size(words: Sequence[bytes]) -> int:
+    # The length of a word list or the size of a table, which may exceed what len() can return
+    return words.size if isinstance(words, AffixTable) else len(words)
@@ -0,0 +1,69 @@
+from __future__ import annotations
+import hashlib
+from typing import Callable, Dict
+
+from CrackerCore.utilities.md4 import MD4
+
+
+def _md4(data: bytes = b''):
+    # Prefer the OpenSSL implementation, newer OpenSSL versions only ship it in the legacy provider
+    try:
+        return hashlib.new('md4', data)
+    except ValueError:
+        return MD4(data)
+
+
+class NTLM:
+    # NTLM is MD4 over the UTF-16LE encoding of the password, the guesses are UTF-8 encoded
+    digest_size = 16
+
+    def __init__(self, data: bytes = b'', state=None) -> None:
+        self.__state = state if state is not None else _md4()
+        self.update(data)
+
+    def update(self, data: bytes) -> None:
+        self.__state.update(bytes(data).decode('utf8', errors='surrogateescape').encode('utf-16le', errors='surrogatepass'))
+
+    def copy(self) -> NTLM:
+        return NTLM(state=self.__state.copy())
+
+    def digest(self) -> bytes:
+        return self.__state.digest()
+
+
+algorithms: Dict[str, Callable] = {
+    'md4': _md4,
+    'md5': hashlib.md5,
+    'sha1': hashlib.sha1,
+    'sha224': hashlib.sha224,
+    'sha256': hashlib.sha256,
+    'sha384': hashlib.sha384,
+    'sha512': hashlib.sha512,
+    'blake2b': hashlib.blake2b,
+    'blake2s': hashlib.blake2s,
+    'ntlm': NTLM,
+}
+
+
+def digest_size(algorithm: str) -> int:
+    return algorithms[algorithm]().digest_size
+
+
+def _pbkdf2(name: str) -> Callable[[bytes, bytes, int, Dict], bytes]:
+    def derive(word: bytes, salt: bytes, width: int, params: Dict) -> bytes:
+        return hashlib.pbkdf2_hmac(name, word, salt, params.get('iterations', 1000), width)
+    return derive
+
+
+def _scrypt(word: bytes, salt: bytes, width: int, params: Dict) -> bytes:
+    n, r, p = params.get('n', 16384), params.get('r', 8), params.get('p', 1)
+    return hashlib.scrypt(word, salt=salt, n=n, r=r, p=p, dklen=width, maxmem=256 * n * r * p + (1 << 20))
+
+
+# Slow key derivation functions, always salted and called with the target width and the parameters of the hash set
+kdfs: Dict[str, Callable[[bytes, bytes, int, Dict], bytes]] = {
+    'pbkdf2_sha1': _pbkdf2('sha1'),
+    'pbkdf2_sha256': _pbkdf2('sha256'),
+    'pbkdf2_sha512': _pbkdf2('sha512'),
+    'scrypt': _scrypt,
+}
@@ -0,0 +1,153 @@
+import os
+import zlib
+from itertools import count
+from multiprocessing import RawArray, RawValue
+from threading import Lock, local
+from typing import List, Tuple
+
+
+class Counter:
+    # A counter that the workers add to without waiting on each other, every worker writes to a slot of its own
+    __slot_count = 1024
+
+    def __init__(self) -> None:
+        self.__slots = RawArray('q', Counter.__slot_count)
+        self.__next_slot = RawValue('q', 0)
+        self.__lock = Lock()
+        self.__local = local()
+
+    def __slot(self) -> int:
+        # A slot is assigned once per worker thread or process
+        owner = getattr(self.__local, 'owner', None)
+        if owner is None or owner[0] != os.getpid():
+            with self.__lock:
+                owner = (os.getpid(), self.__next_slot.value % Counter.__slot_count)
+                self.__next_slot.value += 1
+            self.__local.owner = owner
+        return owner[1]
+
+    def add(self, amount: int) -> None:
+        self.__slots[self.__slot()] += amount
+
+    def share(self, context) -> None:
+        # The slots are in shared memory already, only the slot assignment needs a cross-process lock
+        self.__lock = context.Lock()
+
+    @property
+    def value(self) -> int:
+        return sum(self.__slots)
+
+
+class RangeClaimer:
+    # Hands out a keyspace in fixed size grains, threads draw the grains from a counter without taking a lock.
+    # The grain index is the global position of the guesses, a shard only hands out every count'th grain
+    def __init__(self, total: int, grain: int, shard: Tuple[int, int] = (0, 1)) -> None:
+        self.__total = total
+        self.__grain = grain
+        self.__shard, self.__shards = shard
+        self.__grains = count()
+        self.__shared = None
+        self.__exhausted = RawValue('b', 0)
+        # One flag per grain that is set once the grain has been processed, the workers never share a flag
+        self.__done = RawArray('b', max(-(-total // grain), 1))
+        # The units of the grains of the shard, only the very last grain of the keyspace may be partial
+        grains = -(-total // grain)
+        shard_grains = max(-(-(grains - self.__shard) // self.__shards), 0)
+        last = self.__shard + (shard_grains - 1) * self.__shards
+        self.__size = shard_grains * grain - (grains * grain - total if shard_grains and last == grains - 1 else 0)
+
+    def __next_grains(self, grains: int) -> List[int]:
+        if self.__shared is None:
+            return [next(self.__grains) for _ in range(grains)]
+
+        # Worker processes reserve all of their grains with a single short critical section
+        with self.__shared.get_lock():
+            first = self.__shared.value
+            self.__shared.value = first + grains
+        return list(range(first, first + grains))
+
+    def claim(self, units: int) -> List[Tuple[int, int]]:
+        # Claim at least the given number of units, adjacent grains are merged into a single range
+        ranges: List[Tuple[int, int]] = []
+        wanted = max(-(-units // self.__grain), 1)
+        while wanted > 0:
+            for grain in self.__next_grains(wanted):
+                grain = grain * self.__shards + self.__shard
+                start = grain * self.__grain
+                if start >= self.__total:
+                    self.__exhausted.value = 1
+                    return ranges
+                end = min(start + self.__grain, self.__total)
+                if end >= self.__total:
+                    self.__exhausted.value = 1
+                if self.__done[grain]:
+                    # Grains completed before the run was resumed are skipped
+                    continue
+                wanted -= 1
+                if ranges and ranges[-1][1] == start:
+                    ranges[-1] = (ranges[-1][0], end)
+                else:
+                    ranges.append((start, end))
+        return ranges
+
+    def complete(self, ranges: List[Tuple[int, int]]) -> None:
+        # Mark the grains of processed ranges done
+        for start, end in ranges:
+            for grain in range(start // self.__grain, -(-end // self.__grain)):
+                self.__done[grain] = 1
+
+    def save(self) -> bytes:
+        # The completed grains, compressed as they are mostly long runs of the same flag
+        return zlib.compress(bytes(memoryview(self.__done).cast('B')), 1)
+
+    def load(self, done: bytes) -> None:
+        # Restore the completed grains of an earlier run, they are left out when claiming
+        flags = zlib.decompress(done)
+        if len(flags) != len(self.__done):
+            raise ValueError('The saved grains do not match the keyspace')
+        memoryview(self.__done).cast('B')[:] = flags
+
+    def share(self, context) -> None:
+        # Worker processes draw the grains from a counter in shared memory
+        self.__shared = context.Value('q', next(self.__grains))
+
+    @property
+    def size(self) -> int:
+        return self.__size
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.__exhausted.value)
+
+
+class ClaimCursor:
+    # The ranges a worker claimed and has not pushed yet, a grain may hold far more units than a push takes.
+    # Every worker thread or process works through claims of its own
+    def __init__(self) -> None:
+        self.__local = local()
+
+    def take(self, claimer: RangeClaimer, units: int) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+        # The next ranges of at most the given number of units and the claimed ranges they used up, if any.
+        # New ranges are claimed once the ones of the worker are used up, no ranges are left once all are claimed
+        held = getattr(self.__local, 'held', None)
+        if held is None or held[0] != os.getpid():
+            ranges = claimer.claim(units)
+            if not ranges:
+                return [], []
+            held = self.__local.held = (os.getpid(), ranges, list(ranges))
+
+        _, claimed, left = held
+        taken, size = [], 0
+        while left and size < units:
+            start, end = left[0]
+            stop = min(end, start + units - size)
+            taken.append((start, stop))
+            size += stop - start
+            if stop == end:
+                left.pop(0)
+            else:
+                left[0] = (stop, end)
+        if left:
+            return taken, []
+        self.__local.held = None
+        return taken, claimed
@@ -0,0 +1,46 @@
+from array import array
+from typing import List, Sequence
+
+from CrackerCore.utilities.claim import Counter
+
+
+class CandidateFilter:
+    __mask = (1 << 64) - 1
+    # The fingerprint widths by array type code
+    __widths = (('H', 16), ('I', 32), ('Q', 64))
+
+    def __init__(self, size: int, error_rate: float = 0.001) -> None:
+        # A table of fingerprints addressed by the builtin hash of a candidate, a cuckoo filter with a single slot
+        # per bucket and no relocation: a new candidate evicts the one in its slot, so the table remembers about the
+        # last size candidates in constant memory. A fresh candidate is skipped by mistake only if the slot holds the
+        # same fingerprint, the fingerprints are made wide enough for the error rate
+        self.__code, self.__bits = next((code, bits) for code, bits in CandidateFilter.__widths
+                                        if 2.0 ** (1 - bits) <= error_rate or bits == 64)
+        self.__size = size
+        self.__table = array(self.__code, bytes(array(self.__code).itemsize * size))
+        # The skipped candidates of all workers, forked processes keep tables of their own
+        self.__skipped = Counter()
+
+    def fresh(self, words: Sequence[bytes]) -> List[int]:
+        # Add the words to the filter and return the indices of the ones that were not in it yet
+        table, size, shift, mask = self.__table, self.__size, 64 - self.__bits, CandidateFilter.__mask
+        fresh = []
+        for idx, value in enumerate(map(hash, words)):
+            value &= mask
+            slot, fingerprint = value % size, value >> shift | 1
+            if table[slot] != fingerprint:
+                table[slot] = fingerprint
+                fresh.append(idx)
+        self.__skipped.add(len(words) - len(fresh))
+        return fresh
+
+    def share(self, context) -> None:
+        self.__skipped.share(context)
+
+    @property
+    def memory(self) -> int:
+        return len(self.__table) * self.__table.itemsize
+
+    @property
+    def skipped(self) -> int:
+        return self.__skipped.value
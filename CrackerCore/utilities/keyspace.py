@@ -0,0 +1,63 @@
+import random
+from itertools import cycle, islice
+from time import perf_counter
+from typing import Callable, List, Tuple
+
+from CrackerCore.HashGroup import HashGroup, SaltedHashGroup
+from CrackerCore.utilities.algorithms import algorithms
+from CrackerCore.variators.Variator import Variator
+
+# How many of the first variations of a sampled word the next stage's sample is drawn from
+_head = 64
+
+
+def sample_stages(words: List[bytes], base_count: int, variators: List[Variator]) -> List[Tuple[float, float]]:
+    # Follow a sample of the dictionary through the variators, returns the mean number of variations per input
+    # and the estimated number of candidates each stage produces
+    stages = []
+    population, inputs = base_count, list(words)
+    for variator in variators:
+        if not inputs:
+            stages.append((0.0, 0.0))
+            continue
+        fanout = sum(variator.count(word) for word in inputs) / len(inputs)
+        produced = population * fanout
+        stages.append((fanout, produced))
+
+        # The next stage gets the inputs of this stage along with their variations, sampled in the same proportion
+        variants = [random.choice(head) for head in (list(islice(variator.variations(word), _head)) for word in inputs) if head]
+        picked = min(round(len(words) * produced / (population + produced)), len(variants)) if produced else 0
+        inputs = random.sample(inputs, min(len(inputs), len(words) - picked)) + random.sample(variants, picked)
+        population += produced
+    return stages
+
+
+def _seconds_per_call(function: Callable[[bytes], bytes], words: List[bytes], duration: float) -> float:
+    # Time the function over the words for about the given duration, slow functions are called at least once
+    calls, start = 0, perf_counter()
+    for word in cycle(words or [b'password']):
+        function(word)
+        calls += 1
+        if perf_counter() - start >= duration:
+            break
+    return (perf_counter() - start) / calls
+
+
+def measure_hash_rate(groups: List[HashGroup], words: List[bytes], duration: float = 0.5) -> float:
+    # Guesses a single worker checks per second, each algorithm hashes a guess once and each salted group once per salt
+    cost = 0.0
+    for algorithm in {group.algorithm for group in groups if not isinstance(group, SaltedHashGroup)}:
+        hash_fn = algorithms[algorithm]
+        cost += _seconds_per_call(lambda word: hash_fn(word).digest(), words, duration)
+    for group in groups:
+        if isinstance(group, SaltedHashGroup) and group.salts:
+            salt = group.salts[0]
+            cost += len(group.salts) * _seconds_per_call(lambda word: group.derive(word, salt), words, duration)
+    return 1 / cost if cost else float('inf')
+
+
+def format_duration(seconds: float) -> str:
+    for unit, length in (('years', 365 * 86400), ('days', 86400), ('hours', 3600), ('minutes', 60)):
+        if seconds >= length:
+            return f'{seconds / length:,.1f} {unit}'
+    return f'{seconds:.1f} seconds'
@@ -0,0 +1,80 @@
+from collections import Counter, defaultdict
+from math import log2
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+class MarkovModel:
+    # Every halving of a probability below the most likely one costs a level, higher levels are merged into the last
+    __levels = 10
+
+    def __init__(self, words: Iterable[bytes], max_length: int = 16) -> None:
+        # An OMEN style model of the first two characters of a password, each following character given the two
+        # before it and the length. A guess costs the sum of the levels of its parts, so enumerating the guesses
+        # level by level tries the likely ones first while only the model and the current path are kept in memory
+        starts: Counter = Counter()
+        lengths: Counter = Counter()
+        transitions: Dict[bytes, Counter] = defaultdict(Counter)
+        alphabet = set()
+        for word in words:
+            if not 2 <= len(word) <= max_length:
+                continue
+            alphabet.update(word)
+            starts[word[:2]] += 1
+            lengths[len(word)] += 1
+            for idx in range(2, len(word)):
+                transitions[word[idx-2:idx]][word[idx:idx+1]] += 1
+
+        # Characters never seen after a context still follow it at the last level
+        symbols = [bytes((c,)) for c in sorted(alphabet)]
+        self.__starts = MarkovModel.__grouped(starts, [])
+        self.__lengths = MarkovModel.__grouped(lengths, [])
+        self.__transitions = {context: MarkovModel.__grouped(following, symbols) for context, following in transitions.items()}
+        self.__unseen = MarkovModel.__grouped(Counter(), symbols)
+
+    @staticmethod
+    def __grouped(counts: Counter, unseen: List[bytes]) -> List[Tuple[int, Tuple]]:
+        # The items by ascending level
+        levels = defaultdict(list)
+        top = max(counts.values(), default=1)
+        for item, count in counts.most_common():
+            levels[min(int(log2(top / count)), MarkovModel.__levels)].append(item)
+        levels[MarkovModel.__levels].extend(item for item in unseen if item not in counts)
+        return sorted((level, tuple(items)) for level, items in levels.items() if items)
+
+    def __extend(self, word: bytes, budget: int, left: int) -> Iterator[List[bytes]]:
+        # Complete the word with the given number of characters whose levels add up to the budget
+        table = self.__transitions.get(word[-2:], self.__unseen)
+        if left == 1:
+            for level, symbols in table:
+                if level == budget:
+                    yield list(map(word.__add__, symbols))
+            return
+
+        most = (left - 1) * MarkovModel.__levels
+        for level, symbols in table:
+            if level > budget:
+                break
+            if budget - level > most:
+                continue
+            for symbol in symbols:
+                yield from self.__extend(word + symbol, budget - level, left - 1)
+
+    def candidates(self) -> Iterator[List[bytes]]:
+        # Yield the guesses in batches, every guess of a level before the ones of the next level
+        if not self.__starts:
+            return
+        top_start, top_length = self.__starts[-1][0], self.__lengths[-1][0]
+        longest = max(length for _, lengths in self.__lengths for length in lengths)
+        for total in range(top_length + top_start + (longest - 2) * MarkovModel.__levels + 1):
+            for length_level, lengths in self.__lengths:
+                for start_level, starts in self.__starts:
+                    budget = total - length_level - start_level
+                    if budget < 0:
+                        break
+                    for length in lengths:
+                        if length == 2:
+                            if budget == 0:
+                                yield list(starts)
+                        elif budget <= (length - 2) * MarkovModel.__levels:
+                            for start in starts:
+                                yield from self.__extend(start, budget, length - 2)
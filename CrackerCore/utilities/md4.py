@@ -0,0 +1,75 @@
+from __future__ import annotations
+import struct
+
+
+class MD4:
+    # A pure Python MD4 with the hashlib interface, used when OpenSSL does not provide MD4
+    digest_size = 16
+    block_size = 64
+
+    __mask = 0xffffffff
+
+    def __init__(self, data: bytes = b'') -> None:
+        self.__state = (0x67452301, 0xefcdab89, 0x98badcfe, 0x10325476)
+        self.__buffer = b''
+        self.__length = 0
+        self.update(data)
+
+    @staticmethod
+    def __rotate(value: int, shift: int) -> int:
+        value &= MD4.__mask
+        return ((value << shift) | (value >> (32 - shift))) & MD4.__mask
+
+    @staticmethod
+    def __compress(state, block: bytes):
+        x = struct.unpack('<16I', block)
+        a, b, c, d = state
+        rotate = MD4.__rotate
+
+        # Round 1
+        for i in range(0, 16, 4):
+            a = rotate(a + ((b & c) | (~b & d)) + x[i], 3)
+            d = rotate(d + ((a & b) | (~a & c)) + x[i+1], 7)
+            c = rotate(c + ((d & a) | (~d & b)) + x[i+2], 11)
+            b = rotate(b + ((c & d) | (~c & a)) + x[i+3], 19)
+
+        # Round 2
+        for i in range(4):
+            a = rotate(a + ((b & c) | (b & d) | (c & d)) + x[i] + 0x5a827999, 3)
+            d = rotate(d + ((a & b) | (a & c) | (b & c)) + x[i+4] + 0x5a827999, 5)
+            c = rotate(c + ((d & a) | (d & b) | (a & b)) + x[i+8] + 0x5a827999, 9)
+            b = rotate(b + ((c & d) | (c & a) | (d & a)) + x[i+12] + 0x5a827999, 13)
+
+        # Round 3
+        for i in (0, 2, 1, 3):
+            a = rotate(a + (b ^ c ^ d) + x[i] + 0x6ed9eba1, 3)
+            d = rotate(d + (a ^ b ^ c) + x[i+8] + 0x6ed9eba1, 9)
+            c = rotate(c + (d ^ a ^ b) + x[i+4] + 0x6ed9eba1, 11)
+            b = rotate(b + (c ^ d ^ a) + x[i+12] + 0x6ed9eba1, 15)
+
+        return tuple((s + v) & MD4.__mask for s, v in zip(state, (a, b, c, d)))
+
+    def update(self, data: bytes) -> None:
+        self.__length += len(data)
+        data = self.__buffer + bytes(data)
+        full = len(data) - len(data) % 64
+        for offset in range(0, full, 64):
+            self.__state = MD4.__compress(self.__state, data[offset:offset+64])
+        self.__buffer = data[full:]
+
+    def copy(self) -> MD4:
+        other = MD4()
+        other.__state, other.__buffer, other.__length = self.__state, self.__buffer, self.__length
+        return other
+
+    def digest(self) -> bytes:
+        # Pad a copy so that the state can still be updated afterwards
+        padding = b'\x80' + b'\0' * ((55 - self.__length) % 64) + struct.pack('<Q', (self.__length * 8) & 0xffffffffffffffff)
+        data = self.__buffer + padding
+        state = self.__state
+        for offset in range(0, len(data), 64):
+            state = MD4.__compress(state, data[offset:offset+64])
+        return struct.pack('<4I', *state)
+
+    def hexdigest(self) -> str:
+        return self.digest().hex()
@@ -1,14 +1,75 @@
-from typing import Dict
+from itertools import chain
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+from CrackerCore.HashGroup import HashGroup, SaltedHashGroup
 from CrackerCore.Hasher import Hasher
+from CrackerCore.Potfile import Potfile
 from CrackerCore.WordSource import WordSource
+from CrackerCore.sources.Source import Source
+from CrackerCore.sources.combinator import CombinatorWordSource
+from CrackerCore.sources.compiled import CompiledWordSource
+from CrackerCore.sources.compressed import CompressedWordSource
+from CrackerCore.sources.markov import MarkovWordSource
+from CrackerCore.sources.mask import MaskWordSource
+from CrackerCore.sources.tiered import TieredSource
+from CrackerCore.variators.Variator import Variator
 from CrackerCore.variators.symbol import build_sym_variator
 from CrackerCore.variators.substitution import build_subs_variator
 from CrackerCore.variators.number import build_numr_variator
 from CrackerCore.variators.number import build_numd_variator
 from CrackerCore.variators.capital import build_caps_variator
+from CrackerCore.utilities.algorithms import kdfs
+from CrackerCore.utilities.dedup import CandidateFilter
+from CrackerCore.utilities.markov import MarkovModel
 
 
-def build_pipeline(word_source: WordSource, pipeline_args: Dict, hasher: Hasher):
+def build_word_source(dictionary: Dict, pipeline_args: Optional[Dict] = None) -> Source:
+    # A tiered pipeline needs a source for each tier
+    if pipeline_args is not None and pipeline_args.get('tiers'):
+        return build_tiered_source(dictionary, pipeline_args)
+    return word_source_factory(dictionary)()
+
+
+def word_source_factory(dictionary: Dict) -> Callable[[], Source]:
+    # Markov dictionaries and masks generate their words, combined dictionaries pair the words of two others
+    # and files are read by their type. The word lists and the model of a dictionary are built once,
+    # every source made from them claims the words on its own
+    if 'markov' in dictionary:
+        # Train the model on the given word lists and potfiles
+        words = chain.from_iterable(build_word_source({'path': path}).words() for path in dictionary['markov'].get('lists', []))
+        cracked = chain.from_iterable(Potfile(Path(path)).passwords() for path in dictionary['markov'].get('potfiles', []))
+        model = MarkovModel(chain(words, cracked))
+        made: List[MarkovWordSource] = []
+
+        def make_markov() -> MarkovWordSource:
+            # The sources generate their guesses one after another
+            made.append(MarkovWordSource(model, dictionary['limit'], made[-1] if made else None))
+            return made[-1]
+        return make_markov
+    if 'left' in dictionary:
+        left, right = build_word_source(dictionary['left']).words(), build_word_source(dictionary['right']).words()
+        return lambda: CombinatorWordSource(left, right)
+    if 'mask' in dictionary:
+        increment = tuple(dictionary['increment']) if dictionary.get('increment') else None
+        return lambda: MaskWordSource(dictionary['mask'], dictionary.get('charsets'), increment)
+    path = Path(dictionary['path'])
+    if CompiledWordSource.supports(path):
+        return lambda: CompiledWordSource(path)
+    if CompressedWordSource.supports(path):
+        return lambda: CompressedWordSource(path)
+    return lambda: WordSource(path)
+
+
+def build_hash_group(hash_set: Dict) -> HashGroup:
+    # Key derivation functions and hash sets with a salt position are loaded as salt:hash lines
+    algorithm = hash_set.get('algorithm', 'sha1')
+    if algorithm in kdfs or 'salt' in hash_set:
+        params = {key: hash_set[key] for key in ('iterations', 'n', 'r', 'p') if key in hash_set}
+        return SaltedHashGroup(hash_set['title'], Path(hash_set['path']), algorithm, hash_set.get('salt', 'prefix'), params)
+    return HashGroup(hash_set['title'], Path(hash_set['path']), algorithm)
+
+
+def build_variators(pipeline_args: Dict) -> List[Variator]:
     vari_map = {
         'sym': build_sym_variator,
         'subs': build_subs_variator,
@@ -16,15 +77,57 @@ def build_pipeline(word_source: WordSource, pipeline_args: Dict, hasher: Hasher)
         'numd': build_numd_variator,
         'caps': build_caps_variator
     }
+    return [vari_map[vari[0]](vari[1:]) for vari in pipeline_args['variators']]
+
+
+def build_tiered_source(dictionary: Dict, pipeline_args: Dict) -> TieredSource:
+    # A pass over the dictionary for each stage that is hashed, split further by the affix length if asked to
+    make_source = word_source_factory(dictionary)
+    tiers = []
+    for stage in sorted(set(pipeline_args['hash_sources'])):
+        if stage == 0:
+            source = make_source()
+            tiers.append(('the dictionary', source, source))
+            continue
+        variator = build_variators(pipeline_args)[stage-1]
+        parts = variator.tiers() if pipeline_args['tiers'] == 'affixes' else [variator]
+        for idx, part in enumerate(parts):
+            # The stages before the hashed one need instances of their own in every tier
+            pipeline = [make_source()] + build_variators(pipeline_args)[:stage-1] + [part]
+            for position in range(len(pipeline) - 1):
+                pipeline[position].use_variator(pipeline[position+1])
+            for stage_variator in pipeline[1:]:
+                stage_variator.use_chunk_size(pipeline_args.get('chunk_size', 0))
+            name = f'stage {stage} {" ".join(pipeline_args["variators"][stage-1])}'
+            tiers.append((name + (f' part {idx + 1} of {len(parts)}' if len(parts) > 1 else ''), pipeline[0], part))
+    return TieredSource(tiers)
+
+
+def build_pipeline(word_source: Source, pipeline_args: Dict, hasher: Hasher):
+    # Optionally skip the candidates that were already checked recently
+    if pipeline_args.get('dedup'):
+        hasher.use_filter(CandidateFilter(*pipeline_args['dedup']))
+
+    # Claimed words are only done once the hasher has checked their guesses against the slow groups as well
+    word_source.use_completion(hasher.after)
+
+    # The stages of a tiered source are chained already, each tier only hashes its last stage
+    if isinstance(word_source, TieredSource):
+        word_source.use_hasher(hasher)
+        return word_source
 
     # Create a pipeline starting from the word source passing through each variator
     pipeline = [word_source]
-    pipeline.extend([vari_map[vari[0]](vari[1:]) for vari in pipeline_args['variators']])
+    pipeline.extend(build_variators(pipeline_args))
 
     # Chain the variator together
     for idx in range(len(pipeline) - 1):
         pipeline[idx].use_variator(pipeline[idx+1])
 
+    # Optionally stream the variations through the pipeline in bounded chunks
+    for variator in pipeline[1:]:
+        variator.use_chunk_size(pipeline_args.get('chunk_size', 0))
+
     # Select cariators that send their results to the hasher
     hash_sources = pipeline_args['hash_sources']
     for idx in range(len(pipeline)):
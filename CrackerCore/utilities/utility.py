@@ -1,6 +1,7 @@
 from datetime import datetime
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
 
 
 def capitalize(source: bytes, idx: int) -> bytes:
@@ -9,13 +10,22 @@ def capitalize(source: bytes, idx: int) -> bytes:
     return source[:idx] + source[idx:nxt if nxt else None].upper() + (source[nxt:] if nxt else b'')
 
 
+def chunked(words: Iterable[bytes], size: int) -> Iterator[Set[bytes]]:
+    # Split a stream of words into sets of at most the given size
+    words = iter(words)
+    chunk = set(islice(words, size))
+    while chunk:
+        yield chunk
+        chunk = set(islice(words, size))
+
+
 def export_results(config: Dict, matches: Dict[str, Tuple[Tuple[str, str]]], time_elapsed: float) -> None:
     # Export password matches in a file
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     output_file_name = f'output_{timestamp}.txt'
     with (Path.cwd()/output_file_name).open('w') as out_fl:
         out_fl.write(f'Cracking job run at {timestamp}:\n')
-        out_fl.write(f'Threads: {config["threads"]}\n')
+        out_fl.write(f'Workers: {config["threads"]} ({config["backend"]})\n')
         out_fl.write(f'Dictionary: {config["dict"]["key"]}\n')
         out_fl.write(f'Pipeline: {config["pipeline"]["variators"]}\n')
         out_fl.write(f'Time: {time_elapsed:.2f}s\n\n')
@@ -41,24 +51,6 @@ def flatten_nested_list(tree: Union[List, str]) -> List[str]:
         return new_elems
 
 
-def generate_range(start: int, stop: int) -> List[bytes]:
-    # Generate a range of number pre-/postfixes
-    return [str(v).encode('utf8') for v in range(start, stop+1)]
-
-
-def generate_sequences(count: int, symbols: bytes) -> List[bytes]:
-    # Generate a range of symbol pre-/postfixes
-    # Used for the generation of digits as well
-    sequences = []
-    for _ in range(count):
-        new_seq = []
-        for seq in sequences or [b'']:
-            for sym_idx in range(len(symbols)):
-                new_seq.append(seq + symbols[sym_idx:sym_idx+1])
-        sequences.extend(new_seq)
-    return sequences
-
-
 def print_pipeline_help(variators: List[str]) -> None:
         print('Variator help:\n')
         for variator in variators:
@@ -96,12 +88,12 @@ def print_pipeline_help(variators: List[str]) -> None:
 def select_appender(order: str):
     # To optimize performance the order parameter for variators is applied
     # when the component is built rather than in real time
-    def postfix_appender(source: bytes, appendix: bytes) -> Set[bytes]:
-        return set([source + appendix])
-    def prefix_appender(source: bytes, appendix: bytes) -> Set[bytes]:
-        return set([appendix + source])
-    def both_appender(source: bytes, appendix: bytes) -> Set[bytes]:
-        return set([appendix + source, source + appendix])
+    def postfix_appender(source: bytes, appendix: bytes) -> Tuple[bytes, ...]:
+        return (source + appendix,)
+    def prefix_appender(source: bytes, appendix: bytes) -> Tuple[bytes, ...]:
+        return (appendix + source,)
+    def both_appender(source: bytes, appendix: bytes) -> Tuple[bytes, ...]:
+        return (appendix + source, source + appendix)
     
     return postfix_appender if order == 'post' else \
            prefix_appender if order == 'pre' else \
@@ -1,13 +1,18 @@
 from __future__ import annotations
-from typing import Callable, List, Optional, Set, Union
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Union
 
 from CrackerCore.Hasher import Hasher
+from CrackerCore.utilities.affix import AffixTable
+from CrackerCore.utilities.utility import chunked
 
 
 class Variator:
+    __suffix_block = 1 << 16
+
     def __init__(self) -> None:
         self.__next_variator: Optional[Variator] = None
         self.__hasher: Optional[Hasher] = None
+        self.__chunk_size = 0
 
     def use_hasher(self, hasher: Hasher) -> None:
         # Send all outputs to a hasher
@@ -17,12 +22,64 @@ class Variator:
         # Send all outputs to another variator
         self.__next_variator = variator
 
-    def _int_then(self, sources: Set[bytes], words: Set[bytes]) -> None:
+    def use_chunk_size(self, chunk_size: int) -> None:
+        # Stream the outputs onward in chunks of the given size, 0 materialises all outputs at once
+        self.__chunk_size = chunk_size
+
+    def _int_then(self, sources: Set[bytes], words: Iterable[bytes]) -> None:
         # Send outputs to the hasher and onward in the pipeline
+        if not self.__chunk_size:
+            words = set(words)
+            if self.__hasher is not None:
+                self.__hasher.check(words)
+            if self.__next_variator is not None:
+                self.__next_variator.endpoint(sources | words)
+            return
+
+        # In streaming mode only one chunk of outputs per stage is alive at a time
+        if self.__next_variator is not None:
+            self.__next_variator.endpoint(sources)
+        for chunk in chunked(words, self.__chunk_size):
+            if self.__hasher is not None:
+                self.__hasher.check(chunk)
+            if self.__next_variator is not None:
+                self.__next_variator.endpoint(chunk)
+
+    def _int_then_suffixed(self, sources: Set[bytes], suffixes: AffixTable) -> None:
+        # Send each source followed by each suffix onward, the hasher reuses the hash state of the source
+        if not suffixes:
+            # An empty table adds no guesses, only the sources go on
+            if self.__next_variator is not None:
+                self.__next_variator.endpoint(sources)
+            return
         if self.__hasher is not None:
-            self.__hasher.check(words)
+            # Without a chunk size the hasher still gets the suffixes in blocks, a huge table is no sequence
+            step = self.__chunk_size or Variator.__suffix_block
+            for source in sources:
+                for idx in range(0, suffixes.size, step):
+                    self.__hasher.check_suffixed(source, suffixes[idx:idx+step])
+
+        # The following stages still need the concatenated words
         if self.__next_variator is not None:
-            self.__next_variator.endpoint(sources | words)
+            words = (source + suffix for source in sources for suffix in suffixes)
+            if not self.__chunk_size:
+                self.__next_variator.endpoint(sources | set(words))
+                return
+            self.__next_variator.endpoint(sources)
+            for chunk in chunked(words, self.__chunk_size):
+                self.__next_variator.endpoint(chunk)
+
+    def tiers(self) -> List[Variator]:
+        # Variators that produce the variations of this one in parts of ascending cost, for breadth first runs
+        return [self]
+
+    def variations(self, word: bytes) -> Iterator[bytes]:
+        # The variations of a single word, used to sample the keyspace
+        raise NotImplementedError
+
+    def count(self, word: bytes) -> int:
+        # How many variations a single word gets, variators that can count them without generating them override this
+        return sum(1 for _ in self.variations(word))
 
     @property
     def endpoint(self) -> Callable[[Set[bytes]], None]:
@@ -1,4 +1,5 @@
-from typing import Callable, Dict, List, Set, Tuple
+from itertools import islice, product
+from typing import Callable, Iterator, List, Set, Tuple
 from CrackerCore.utilities.utility import capitalize
 
 from CrackerCore.variators.Variator import Variator
@@ -8,85 +9,76 @@ class CapitalVariator(Variator):
     def __init__(self, arg: str) -> None:
         super().__init__()
 
+        self.__mode = arg
         if arg == '*':
-            self.__endpoint = self.__each_endpoint()
+            self.__endpoint, self.__variations = self.__each_endpoint()
         elif arg == '**':
-            self.__endpoint = self.__all_endpoint()
+            self.__endpoint, self.__variations = self.__all_endpoint()
         else:
-            self.__endpoint = self.__index_endpoint(arg)
+            self.__endpoint, self.__variations = self.__index_endpoint(arg)
 
-    @staticmethod
-    def __int_substitutor_substitutor(source: bytes, symbol: bytes, substitute: bytes) -> Set[bytes]:
-        output_set = set()
-
-        # Capitalize each occurence of the symbol
-        pos = source.find(symbol)
-        while pos > 0:
-            new_source = source[0:pos] + substitute + source[pos+1:]
-            output_set |= CapitalVariator.__int_substitutor_substitutor(new_source, symbol, substitute)
-            output_set.add(new_source)
-            pos = source.find(symbol, pos+1)
-
-        return output_set
-
-    @staticmethod
-    def __int_substitutor(substitutes: List[Tuple[bytes]], sources: Set[bytes]) -> Set[bytes]:
-        output_set = set()
-
-        # Capitalize each occurence of each symbol
-        for word in sources:
-            for substitute in substitutes:
-                output_set |= CapitalVariator.__int_substitutor_substitutor(word, substitute[0], substitute[1])
-
-        return output_set
-
-    def __all_endpoint(self) -> Callable[[Set[bytes]], None]:
+    def __all_endpoint(self) -> Tuple[Callable[[Set[bytes]], None], Callable[[Set[bytes]], Iterator[bytes]]]:
         # Build an endpoint to capitalize all combinations
-        substitutes = [(s.encode('utf8'), s.upper().encode('utf8')) for s in 'abcdefghijklmnopqrstuvwxyz']
         then = self._int_then
+        cases = {c: (bytes((c,)), bytes((c - 32,))) for c in range(97, 123)}
+
+        def variations(sources: Set[bytes]) -> Iterator[bytes]:
+            for word in sources:
+                # Every lowercase letter is either kept or capitalized, the first combination is the word itself
+                parts = [cases.get(c) or (word[i:i+1],) for i, c in enumerate(word)]
+                yield from islice(map(b''.join, product(*parts)), 1, None)
 
         def endpoint(sources: Set[bytes]) -> None:
-            result_set = set()
-            # Make one round of capitalizations and for as long as there are letters to capitalize, go over it again
-            new_substituted = CapitalVariator.__int_substitutor(sources)
-            while len(new_substituted) > 0:
-                result_set |= new_substituted
-                new_substituted = CapitalVariator.__int_substitutor(substitutes, new_substituted)
-            then(sources, result_set)
+            then(sources, variations(sources))
 
-        return endpoint
+        return endpoint, variations
 
-    def __each_endpoint(self) -> Callable[[Set[bytes]], None]:
+    def __each_endpoint(self) -> Tuple[Callable[[Set[bytes]], None], Callable[[Set[bytes]], Iterator[bytes]]]:
         # Build an endpoint to capitalize each letter individually
         then = self._int_then
 
-        def endpoint(sources: Set[bytes]) -> None:
-            result_set = set()
+        def variations(sources: Set[bytes]) -> Iterator[bytes]:
             for word in sources:
-                # Go through the letters and capitalize them
-                capitalized = {capitalize(word, i) for i in range(len(word))}
-                result_set |= capitalized
+                # Go through the lowercase letters and capitalize them
+                for i, c in enumerate(word):
+                    if 97 <= c <= 122:
+                        yield capitalize(word, i)
 
-            then(sources, result_set)
+        def endpoint(sources: Set[bytes]) -> None:
+            then(sources, variations(sources))
 
-        return endpoint
+        return endpoint, variations
 
-    def __index_endpoint(self, indices: int) -> Callable[[Set[bytes]], None]:
+    def __index_endpoint(self, indices: int) -> Tuple[Callable[[Set[bytes]], None], Callable[[Set[bytes]], Iterator[bytes]]]:
         # Build an endpoint to capitalize the given indices
 
         then = self._int_then
         valid = [abs(idx) for idx in indices]
 
-        def endpoint(sources: Set[bytes]) -> None:
-            result_set = set()
+        def variations(sources: Set[bytes]) -> Iterator[bytes]:
             for idx in range(len(indices)):
                 # Capitalize a character if the index is not greater than the length of the word
-                result_set |= {capitalize(word, indices[idx]) for word in sources if len(word) >= valid[idx]}
-
-            # Pass the new word set forward
-            then(sources, result_set)
+                for word in sources:
+                    if len(word) >= valid[idx]:
+                        yield capitalize(word, indices[idx])
 
-        return endpoint
+        def endpoint(sources: Set[bytes]) -> None:
+            # Pass the new words forward
+            then(sources, variations(sources))
+
+        return endpoint, variations
+
+    def variations(self, word: bytes) -> Iterator[bytes]:
+        return self.__variations({word})
+
+    def count(self, word: bytes) -> int:
+        # Every combination of the lowercase letters gets capitalized
+        letters = sum(1 for c in word if 97 <= c <= 122)
+        if self.__mode == '**':
+            return (1 << letters) - 1
+        if self.__mode == '*':
+            return letters
+        return super().count(word)
 
     @property
     def endpoint(self) -> Callable[[Set[bytes]], None]:
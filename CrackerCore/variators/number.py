@@ -1,26 +1,51 @@
-from typing import Callable, List, Set, Tuple, Union
+from typing import Callable, Iterator, List, Set, Tuple, Union
 
-from CrackerCore.utilities.utility import generate_sequences, generate_range, select_appender
+from CrackerCore.utilities.affix import RangeTable, SequenceTable
+from CrackerCore.utilities.utility import select_appender
 from CrackerCore.variators.Variator import Variator
 
 
 class NumberVariator(Variator):
-    def __init__(self, mode: str, arg: Union[int, Tuple[int, int]], order: str = 'post') -> None:
+    def __init__(self, mode: str, arg: Union[int, Tuple[int, int]], order: str = 'post', shortest: int = 1) -> None:
         super().__init__()
-        # Precompute all pre-/postfixes
-        self.__value_set = generate_range(arg[0], arg[1]) if mode == 'range' else \
-                           generate_sequences(arg, b'1234567890') if mode == 'digits' else []
+        self.__mode, self.__arg, self.__order, self.__shortest = mode, arg, order, shortest
+        # Address the pre-/postfixes by index rather than materialising them
+        self.__value_set = RangeTable(arg[0], arg[1]) if mode == 'range' else \
+                           SequenceTable(b'1234567890', arg, shortest) if mode == 'digits' else RangeTable(1, 0)
 
-        # Select the concatenation order
+        # Select the concatenation order, appended postfixes reuse the hash state of the source
         self.__appender = select_appender(order)
+        self.__suffixed = order == 'post'
 
-    def __endpoint(self, sources: Set[bytes]) -> None:
-        result_set = set()
+    def __variations(self, sources: Set[bytes]) -> Iterator[bytes]:
         # Apply each pre-/postfix
+        appender = self.__appender
         for source in sources:
             for appendix in self.__value_set:
-                result_set |= self.__appender(source, appendix)
-        self._int_then(sources, result_set)
+                yield from appender(source, appendix)
+
+    def __endpoint(self, sources: Set[bytes]) -> None:
+        if self.__suffixed:
+            self._int_then_suffixed(sources, self.__value_set)
+        else:
+            self._int_then(sources, self.__variations(sources))
+
+    def variations(self, word: bytes) -> Iterator[bytes]:
+        return self.__variations({word})
+
+    def tiers(self) -> List[Variator]:
+        # One tier per number of digits
+        if self.__mode == 'digits':
+            return [NumberVariator('digits', length, self.__order, length) for length in range(self.__shortest, self.__arg + 1)]
+        if self.__mode == 'range':
+            first, last = self.__arg
+            bounds = [first] + [10 ** digits for digits in range(len(str(max(first, 0))), len(str(max(last, 0)))) if 10 ** digits > first]
+            return [NumberVariator('range', (start, min(stop - 1, last)), self.__order)
+                    for start, stop in zip(bounds, bounds[1:] + [last + 1])]
+        return [self]
+
+    def count(self, word: bytes) -> int:
+        return self.__value_set.size * len(self.__appender(word, b''))
 
     @property
     def endpoint(self) -> Callable[[Set[bytes]], None]:
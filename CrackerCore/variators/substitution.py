@@ -1,4 +1,6 @@
-from typing import Callable, Dict, List, Set, Tuple
+from itertools import islice, product
+from math import prod
+from typing import Callable, Dict, Iterator, List, Set, Tuple
 
 from CrackerCore.variators.Variator import Variator
 
@@ -21,67 +23,47 @@ class SubstitutionVariator(Variator):
 
     def __init__(self, symbols: str, greedy: bool = False) -> None:
         super().__init__()
-        # Select the symbols to substitute
-        self.__substitutes = [self.__substitutionTable[s] for s in symbols]
+        # Select the symbols to substitute and group them by the letter they stand for, the letter comes first
+        self.__options: Dict[int, Tuple[bytes, ...]] = {}
+        for letter, symbol in (self.__substitutionTable[s] for s in symbols):
+            self.__options[letter[0]] = tuple(dict.fromkeys(self.__options.get(letter[0], (letter,)) + (symbol,)))
         # Select the active endpoint
+        self.__greedy = greedy
         self.__endpoint = self.__greedy_endpoint if greedy else self.__default_endpoint
+        self.__variations = self.__greedy_variations if greedy else self.__default_variations
 
-    @staticmethod
-    def __int_default_substitutor_substitutor(source: bytes, symbol: bytes, substitute: bytes) -> Set[bytes]:
-        output_set = set()
-
-        pos = source.find(symbol)
-        
-        # Substitute each symbol
-        while pos > 0:
-            new_source = source[0:pos] + substitute + source[pos+1:]
-            output_set |= SubstitutionVariator.__int_default_substitutor_substitutor(new_source, symbol, substitute)
-            output_set.add(new_source)
-            pos = source.find(symbol, pos+1)
-
-        return output_set
-
-    def __int_default_substitutor(self, sources: Set[bytes]) -> Set[bytes]:
-        output_set = set()
-        
-        # Make one round of substitutions over and over again for as long as there are symbols to substitute
+    def __default_variations(self, sources: Set[bytes]) -> Iterator[bytes]:
+        options = self.__options
         for word in sources:
-            for substitute in self.__substitutes:
-                output_set |= SubstitutionVariator.__int_default_substitutor_substitutor(word, substitute[0], substitute[1])
-
-        return output_set
+            # Every substitutable letter is either kept or replaced by one of its symbols, the first combination is the word itself
+            parts = [options.get(c) or (word[i:i+1],) for i, c in enumerate(word)]
+            yield from islice(map(b''.join, product(*parts)), 1, None)
 
     def __default_endpoint(self, sources: Set[bytes]) -> None:
-        result_set = set()
-        
-        # Make one round of substitutions over and over again for as long as there are symbols to substitute
-        new_substituted = self.__int_default_substitutor(sources)
-        while len(new_substituted) > 0:
-            result_set |= new_substituted
-            new_substituted = self.__int_default_substitutor(new_substituted)
-        self._int_then(sources, result_set)
-
-    def __int_greedy_substitutor(self, sources: Set[bytes]) -> Set[bytes]:
-        output_set = set()
-        
-        # Substitute all occurences of each symbol
-        for word in sources:
-            for substitute in self.__substitutes:
-                symbol = substitute[0]
-                if symbol in word:
-                    output_set.add(word.replace(symbol, substitute[1]))
+        self._int_then(sources, self.__default_variations(sources))
 
-        return output_set
+    def __greedy_variations(self, sources: Set[bytes]) -> Iterator[bytes]:
+        options = self.__options
+        for word in sources:
+            # All occurences of a letter are replaced by the same symbol, every combination of the letters in the word
+            letters = [letter for letter in options if letter in word]
+            source = bytes(letters)
+            for replacement in islice(product(*(options[letter] for letter in letters)), 1, None):
+                yield word.translate(bytes.maketrans(source, b''.join(replacement)))
 
     def __greedy_endpoint(self, sources: Set[bytes]) -> None:
-        result_set = set()
-    
-        # Make one round of substitutions over and over again for as long as there are symbols to substitute
-        new_substituted = self.__int_greedy_substitutor(sources)
-        while len(new_substituted) > 0:
-            result_set |= new_substituted
-            new_substituted = self.__int_greedy_substitutor(new_substituted)
-        self._int_then(sources, result_set)
+        self._int_then(sources, self.__greedy_variations(sources))
+
+    def variations(self, word: bytes) -> Iterator[bytes]:
+        return self.__variations({word})
+
+    def count(self, word: bytes) -> int:
+        # Every combination of the options but the word itself
+        if self.__greedy:
+            letters = [self.__options[letter] for letter in self.__options if letter in word]
+        else:
+            letters = [self.__options[c] for c in word if c in self.__options]
+        return prod(map(len, letters)) - 1
 
     @property
     def endpoint(self) -> Callable[[Set[bytes]], None]:
@@ -91,12 +73,12 @@ class SubstitutionVariator(Variator):
 def build_subs_variator(args: List[str]) -> SubstitutionVariator:
     # Parse variator arguments and build the variator
 
-    symbols = b'$@!013456789'
+    symbols = '$@!013456789'
     greedy = False
 
     for arg in args:
         if arg.startswith('s='):
-            symbols = arg[2:].encode('utf8')
+            symbols = arg[2:]
         elif arg.startswith('g='):
             greedy = True if arg[2:] == 't' else False
 
@@ -1,24 +1,42 @@
-from typing import Callable, List, Set
+from typing import Callable, Iterator, List, Set
 
-from CrackerCore.utilities.utility import generate_sequences, select_appender
+from CrackerCore.utilities.affix import SequenceTable
+from CrackerCore.utilities.utility import select_appender
 from CrackerCore.variators.Variator import Variator
 
 
 class SymbolVariator(Variator):
-    def __init__(self, count: int, symbols: bytes, order: str = 'post') -> None:
+    def __init__(self, count: int, symbols: bytes, order: str = 'post', shortest: int = 1) -> None:
         super().__init__()
-        # Precompute all pre-/postfixes
-        self.__symbol_set = generate_sequences(count, symbols)
-        # Select the concatenation order
+        self.__count, self.__symbols, self.__order, self.__shortest = count, symbols, order, shortest
+        # Address the pre-/postfixes by index rather than materialising them
+        self.__symbol_set = SequenceTable(symbols, count, shortest)
+        # Select the concatenation order, appended postfixes reuse the hash state of the source
         self.__appender = select_appender(order)
+        self.__suffixed = order == 'post'
 
-    def __endpoint(self, sources: Set[bytes]) -> None:
-        result_set = set()
+    def __variations(self, sources: Set[bytes]) -> Iterator[bytes]:
         # Apply each pre-/postfix
+        appender = self.__appender
         for source in sources:
             for appendix in self.__symbol_set:
-                result_set |= self.__appender(source, appendix)
-        self._int_then(sources, result_set)
+                yield from appender(source, appendix)
+
+    def __endpoint(self, sources: Set[bytes]) -> None:
+        if self.__suffixed:
+            self._int_then_suffixed(sources, self.__symbol_set)
+        else:
+            self._int_then(sources, self.__variations(sources))
+
+    def variations(self, word: bytes) -> Iterator[bytes]:
+        return self.__variations({word})
+
+    def tiers(self) -> List[Variator]:
+        # One tier per number of symbols
+        return [SymbolVariator(length, self.__symbols, self.__order, length) for length in range(self.__shortest, self.__count + 1)]
+
+    def count(self, word: bytes) -> int:
+        return self.__symbol_set.size * len(self.__appender(word, b''))
 
     @property
     def endpoint(self) -> Callable[[Set[bytes]], None]:
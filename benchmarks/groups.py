@@ -0,0 +1,18 @@
+import hashlib
+from typing import Iterable, Optional
+
+from CrackerCore.DigestIndex import DigestIndex
+
+
+class BenchGroup:
+    # A stand-in for a sha1 hash group that only collects the matches, without targets it never matches
+    def __init__(self, hashes: Optional[Iterable[bytes]] = None) -> None:
+        self.hashes = DigestIndex.build(hashes or [hashlib.sha1(b'no match').digest()], 20)
+        self.title = 'bench'
+        self.algorithm = 'sha1'
+        # Matches are not discarded, so the group never runs out of targets
+        self.remaining = len(self.hashes)
+        self.matches = {}
+
+    def add_match(self, match: bytes, match_hash: bytes) -> None:
+        self.matches[match] = match_hash
@@ -0,0 +1,55 @@
+import hashlib
+import os
+import sys
+from time import perf_counter
+from typing import Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CrackerCore.Hasher import Hasher
+from benchmarks.groups import BenchGroup
+
+
+def legacy_check(hashes: Set[bytes], groups, words: Set[bytes]) -> None:
+    # The previous implementation: hash everything, intersect, then hash everything again on a hit
+    hashed_words = {hashlib.sha1(word).digest() for word in words}
+    if hashes & hashed_words:
+        for word in words:
+            hashed = hashlib.sha1(word).digest()
+            group = groups.get(hashed, None)
+            if group:
+                group.add_match(word, hashed)
+    if words:
+        words.pop()
+
+
+def measure(check, batches, rounds: int) -> float:
+    # Return the achieved hashes per second
+    candidates = sum(len(b) for b in batches) * rounds
+    start = perf_counter()
+    for _ in range(rounds):
+        for batch in batches:
+            check(set(batch))
+    return candidates / (perf_counter() - start)
+
+
+if __name__ == '__main__':
+    batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    batch_count = 1000
+    rounds = 5
+
+    # Every batch contains a single matching word
+    batches = [[f'word{b}_{i}'.encode('utf8') for i in range(batch_size)] for b in range(batch_count)]
+    targets = {hashlib.sha1(batch[0]).digest() for batch in batches}
+
+    group = BenchGroup(targets)
+    legacy_groups = {digest: group for digest in targets}
+    hasher = Hasher()
+    hasher.add_group(group)
+
+    before = measure(lambda words: legacy_check(targets, legacy_groups, words), batches, rounds)
+    after = measure(hasher.check, batches, rounds)
+
+    print(f'Batches of {batch_size} words, each containing a match')
+    print(f'Before: {before:12,.0f} hashes/s')
+    print(f'After:  {after:12,.0f} hashes/s ({after / before:.2f}x)')
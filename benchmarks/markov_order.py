@@ -0,0 +1,104 @@
+import os
+import random
+import sys
+import tracemalloc
+from itertools import chain, islice, product
+from time import perf_counter
+from typing import Iterable, Iterator, List, Set
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CrackerCore.utilities.markov import MarkovModel
+
+
+def synthetic(count: int) -> List[bytes]:
+    # Passwords made of a few syllables followed by a number or a year, for when no real list is given
+    syllables = ['ma', 'ri', 'an', 'na', 'jo', 'el', 'la', 'ke', 'vin', 'ter', 'son', 'ro', 'sa', 'li', 'da', 'mi']
+    words = []
+    for _ in range(count):
+        word = ''.join(random.choice(syllables) for _ in range(random.choice((2, 2, 3, 3, 4))))
+        roll = random.random()
+        if roll < 0.4:
+            word += str(random.randint(0, 99))
+        elif roll < 0.6:
+            word += str(random.randint(1960, 2020))
+        words.append(word.encode('utf8'))
+    return words
+
+
+def cracks(guesses: Iterable[bytes], targets: Set[bytes], budgets: List[int]):
+    # The number of targets found within each budget of guesses and the position of the first one
+    found, first, counts = set(), None, []
+    for position, guess in enumerate(islice(guesses, budgets[-1]), start=1):
+        if guess in targets and guess not in found:
+            found.add(guess)
+            first = first or position
+        if position in budgets:
+            counts.append(len(found))
+    counts.extend([len(found)] * (len(budgets) - len(counts)))
+    return counts, first
+
+
+def brute_force(training: List[bytes]) -> Iterator[bytes]:
+    # Every word over the alphabet of the training passwords, the shorter ones first, like an incremented mask
+    alphabet = [bytes((c,)) for c in sorted(set(chain.from_iterable(training)))]
+    for length in range(1, 64):
+        yield from map(b''.join, product(alphabet, repeat=length))
+
+
+def peak_memory(guesses: Iterable[bytes], budget: int) -> int:
+    # The most memory allocated while going through the given number of guesses
+    tracemalloc.start()
+    for _ in islice(guesses, budget):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def compare(passwords: List[bytes], budgets: List[int], seed: int):
+    # Train on most of a shuffled password list and count the held-out passwords each order finds with the same
+    # number of guesses. Only passwords that are not in the training list are held out, the ones that are would
+    # be found by the dictionary itself, so a model order competes with a brute force of the same alphabet
+    random.seed(seed)
+    passwords = list(passwords)
+    random.shuffle(passwords)
+    split = len(passwords) * 4 // 5
+    training = passwords[:split]
+    held_out = set(passwords[split:]) - set(training)
+
+    start = perf_counter()
+    model = MarkovModel(training)
+    trained = perf_counter() - start
+    start = perf_counter()
+    markov = cracks(chain.from_iterable(model.candidates()), held_out, budgets)
+    generated = perf_counter() - start
+    brute = cracks(brute_force(training), held_out, budgets)
+    peak = peak_memory(chain.from_iterable(model.candidates()), budgets[-1])
+    print(f'Seed {seed}: trained on {len(training)} passwords in {trained:.2f}s, {len(held_out)} new passwords held out, '
+          f'generated the Markov guesses in {generated:.2f}s with at most {peak / 1024:,.0f} KiB allocated')
+    return brute, markov
+
+
+if __name__ == '__main__':
+    # Compare the orders over several splits
+    random.seed(0)
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], 'rb') as word_file:
+            passwords = [line.rstrip(b'\r\n') for line in word_file if line.strip()]
+    else:
+        passwords = synthetic(50000)
+
+    budgets = [10 ** exponent for exponent in range(2, 7)]
+    seeds = range(1, 6)
+    results = [compare(passwords, budgets, seed) for seed in seeds]
+
+    print(f'\nMean over {len(seeds)} seeds of the held-out passwords found')
+    print(f'{"guesses":>10} {"brute force":>12} {"markov":>12}')
+    for idx, budget in enumerate(budgets):
+        before = sum(brute[0][idx] for brute, _ in results) / len(results)
+        after = sum(markov[0][idx] for _, markov in results) / len(results)
+        print(f'{budget:>10,} {before:>12,.1f} {after:>12,.1f}')
+    for name, pick in (('brute force', 0), ('markov', 1)):
+        firsts = [result[pick][1] for result in results]
+        print(f'First hit of the {name} order by seed: {", ".join(str(first or "-") for first in firsts)}')
@@ -0,0 +1,46 @@
+import os
+import sys
+from time import perf_counter
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from CrackerCore.Hasher import Hasher
+from CrackerCore.utilities.affix import SequenceTable
+from benchmarks.groups import BenchGroup
+
+
+def measure(checks, words, suffixes, rounds: int) -> List[float]:
+    # Return the hashes per second of the fastest round of each check, the rounds of the checks alternate so
+    # that whatever else runs on the machine disturbs all of them alike
+    best = [float('inf')] * len(checks)
+    for _ in range(rounds):
+        for idx, check in enumerate(checks):
+            start = perf_counter()
+            check(words, suffixes)
+            best[idx] = min(best[idx], perf_counter() - start)
+    return [len(words) * len(suffixes) / elapsed for elapsed in best]
+
+
+if __name__ == '__main__':
+    prefix_length = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    hasher = Hasher()
+    hasher.add_group(BenchGroup())
+
+    def concatenated(words, suffixes):
+        # Hash every fully concatenated word
+        for word in words:
+            hasher.check([word + suffix for suffix in suffixes])
+
+    def midstate(words, suffixes):
+        # Hash the word once and extend a copy of the state with each suffix
+        for word in words:
+            hasher.check_suffixed(word, suffixes)
+
+    print(f'Prefixes of {prefix_length} bytes')
+    print(f'{"suffixes":>10} {"concatenated":>16} {"midstate":>16} {"speedup":>8}')
+    for digits in range(1, 5):
+        suffixes = SequenceTable(b'1234567890', digits)
+        words = [(b'w%d' % i).ljust(prefix_length, b'x') for i in range(max(50000 // len(suffixes), 2))]
+        before, after = measure([concatenated, midstate], words, suffixes, 9)
+        print(f'{len(suffixes):>10} {before:>14,.0f}/s {after:>14,.0f}/s {after / before:>7.2f}x')
@@ -6,7 +6,12 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict
 
+from CrackerCore.Checkpoint import Checkpoint
+from CrackerCore.Coordinator import Coordinator, parse_address
+from CrackerCore.sources.compiled import CompiledWordSource
+from CrackerCore.sources.mask import parse_mask
 from CrackerCore.user_interfaces.cli import cli
+from CrackerCore.user_interfaces.estimate import estimate
 from CrackerCore.utilities.utility import flatten_nested_list, print_pipeline_help
 
 try:
@@ -16,7 +21,47 @@ except ImportError:
         raise ModuleNotFoundError('Cannot use advanced interface, \'Rich\' library is likely not installed')
 
 
+def compile_dict(argv) -> None:
+    # Precompile a dictionary into the binary format read by the compiled word source
+    parser = ArgumentParser(
+        prog='cracktool compile-dict',
+        description='Deduplicate a dictionary and store it in a format that can be used without parsing'
+    )
+    parser.add_argument('source', type=Path, help='The dictionary to compile')
+    parser.add_argument('target', type=Path, nargs='?', help='The compiled dictionary, defaults to the source with a .ctdict suffix')
+    parser.add_argument('-l', '--by-length', action='store_true', help='Sort the words by length and store the length buckets')
+    args = parser.parse_args(argv)
+
+    target = args.target or args.source.with_suffix('.ctdict')
+    count = CompiledWordSource.compile(args.source, target, args.by_length)
+    print(f'Compiled {count} unique words into {target}')
+
+
+def coordinate(argv) -> None:
+    # Hand the dictionary out to nodes started with --coordinator and collect their matches
+    parser = ArgumentParser(
+        prog='cracktool coordinate',
+        description='Coordinate nodes that go through the same dictionary and pipeline'
+    )
+    parser.add_argument('-l', '--listen', metavar='host:port', default='0.0.0.0:7357', help='The address to listen on, defaults to 0.0.0.0:7357')
+    parser.add_argument('-o', '--output', metavar='path', type=Path, default=Path.cwd()/'coordinated_matches.txt',
+                        help='Append the matches of the nodes to this file')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(format='%(asctime)s [%(threadName)-9s] %(message)s', level=logging.INFO, stream=sys.stdout)
+    coordinator = Coordinator(parse_address(args.listen), args.output)
+    logging.info(f'Listening on {args.listen}')
+    coordinator.run()
+
+
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['compile-dict']:
+        compile_dict(sys.argv[2:])
+        exit(0)
+    if sys.argv[1:2] == ['coordinate']:
+        coordinate(sys.argv[2:])
+        exit(0)
+
     #
     # Define commandline arguments
     #
@@ -29,13 +74,76 @@ if __name__ == '__main__':
                         help='Use a custom config file path')
     parser.add_argument('-g', '--graphical', dest='ui', action='store_const', const=tui, default=cli,
                         help='Use a graphical UI (Rich library required)')
+    parser.add_argument('--estimate', dest='ui', action='store_const', const=estimate,
+                        help='Estimate the number of candidates and the runtime of the job instead of running it')
     parser.add_argument('-t', '--threads', metavar='T', type=int, required=False, default=4,
-                        help="How many threads to use, defaults to four")
+                        help="How many workers to use, defaults to four")
+    parser.add_argument('-b', '--backend', dest='backend', choices=('thread', 'process'), default='thread',
+                        help="Run the workers as threads or as processes, defaults to threads")
+    parser.add_argument('--batch-time', dest='batch_time', metavar='MS', type=float, default=50,
+                        help="Size the batches so that each takes about this many milliseconds, defaults to 50")
+    parser.add_argument('--potfile', dest='potfile', metavar='path', type=Path,
+                        help="Store the cracked hashes in this potfile, defaults to the one in the config or cracktool.pot")
+    parser.add_argument('--no-potfile', dest='potfile', action='store_const', const='',
+                        help="Do not use a potfile")
+    parser.add_argument('--ledger', dest='ledger', metavar='path', type=Path,
+                        help="Keep the completed jobs in this ledger, defaults to the one in the config or cracktool.ledger")
+    parser.add_argument('--no-ledger', dest='ledger', action='store_const', const='',
+                        help="Do not skip the jobs that have been completed before")
+    parser.add_argument('--checkpoint', dest='checkpoint', metavar='path', type=Path,
+                        help="Write checkpoints of the job to this file, defaults to cracktool.checkpoint")
+    parser.add_argument('--no-checkpoint', dest='checkpoint', action='store_const', const='',
+                        help="Do not write checkpoints")
+    parser.add_argument('--checkpoint-interval', dest='checkpoint_interval', metavar='S', type=float, default=60,
+                        help="Seconds between checkpoints, defaults to 60")
+    parser.add_argument('--resume', dest='resume', metavar='path', type=Path,
+                        help="Continue the job stored in a checkpoint, the dictionary, pipeline and hash sets are taken from it")
+    parser.add_argument('--shard', dest='shard', metavar='i/n', default='0/1',
+                        help="Only go through the i'th of n interleaved shards of the dictionary, counting from zero")
+    parser.add_argument('--coordinator', dest='coordinator', metavar='host:port',
+                        help="Take the dictionary ranges from a coordinator started with 'cracktool coordinate'")
     parser.add_argument('-d', '--dictionary', dest='dict', metavar='id', help="Select the dictionary used, defaults to first available")
 
+    group = parser.add_argument_group('Generate the words from a mask instead of a dictionary')
+    group.add_argument('-m', '--mask', dest='mask', metavar='mask',
+                       help='Try every word of the mask, e.g. ?u?l?l?l?d?d: ?l ?u ?d ?s ?a ?h ?H ?b are built in charsets, ?1 to ?4 custom ones')
+    for idx in range(1, 5):
+        group.add_argument(f'-{idx}', f'--charset{idx}', dest=f'charset{idx}', metavar='chars',
+                           help=f'Define the custom charset ?{idx}, built in charsets may be used in it')
+    group.add_argument('--increment', dest='increment', action='store_true',
+                       help='Try the shorter prefixes of the mask first')
+    group.add_argument('--increment-min', dest='increment_min', metavar='N', type=int, default=1,
+                       help='The length to start the increments at')
+    group.add_argument('--increment-max', dest='increment_max', metavar='N', type=int,
+                       help='The length to stop the increments at, defaults to the mask length')
+
+    group = parser.add_argument_group('Generate the words in the order of their probability instead of a dictionary')
+    group.add_argument('--markov', dest='markov', metavar='id', nargs='*',
+                       help='Train a Markov model on these dictionaries or word lists and try its most likely words first')
+    group.add_argument('--markov-potfile', dest='markov_potfile', action='store_true',
+                       help='Train the Markov model on the passwords of the potfile as well')
+    group.add_argument('--markov-limit', dest='markov_limit', metavar='N', type=int, default=10_000_000,
+                       help='How many words to generate, defaults to 10000000')
+
+    group = parser.add_argument_group('Combine the dictionary or the mask with a second word list')
+    group.add_argument('--combine', dest='combine', metavar='id',
+                       help='Follow each word by each word of this dictionary')
+    group.add_argument('--combine-mask', dest='combine_mask', metavar='mask',
+                       help='Follow each word by each word of this mask, the charset and increment options apply to it')
+
     group = parser.add_argument_group('Add variators to the given pipeline')
     group.add_argument('-p', '--pipeline', dest='pipeline', action='append', nargs='*', metavar='V', help='add variators (see formatting help below)')
     group.add_argument('-s', '--source', dest='hash_sources', metavar='indices', help='Define which variators are hash sources (defaults to all). 0 refers to the word source')
+    group.add_argument('--chunk-size', dest='chunk_size', metavar='N', type=int, default=0,
+                       help='Stream variations through the pipeline N at a time to bound memory use (0 disables streaming)')
+    group.add_argument('--dedup', dest='dedup', metavar='N', type=int, nargs='?', const=1 << 22, default=0,
+                       help='Do not hash a candidate twice within a window of N candidates, defaults to 4194304 if N is not given. Jobs run with it are not recorded in the ledger')
+    group.add_argument('--dedup-error', dest='dedup_error', metavar='P', type=float, default=0.001,
+                       help='The rate of fresh candidates the dedup filter skips by mistake, lower rates use more memory')
+    group.add_argument('--tiered', dest='tiers', action='store_const', const='stages',
+                       help='Run the whole dictionary through each hashed stage before moving on to the next one')
+    group.add_argument('--tiered-affixes', dest='tiers', action='store_const', const='affixes',
+                       help='Like --tiered, also running the affix lengths of the number and symbol stages one after another')
     group.add_argument('--sym', dest='pipeline_help', action='append_const', const='sym', help='add symbols: sym $count s=$syms o=$ord')
     group.add_argument('--subs', dest='pipeline_help', action='append_const', const='subs', help='make substitutions: subs s=$syms g=$greedy')
     group.add_argument('--numr', dest='pipeline_help', action='append_const', const='numr', help='add number range: numr $range o=$ord')
@@ -65,20 +173,63 @@ if __name__ == '__main__':
     if args.threads > 0:
         config['threads'] = args.threads
     else:
-        print('At least one thread is required', sys.stderr)
+        print('At least one thread is required', file=sys.stderr)
         exit(-1)
 
-    if args.dict is not None:
+    config['backend'] = args.backend
+
+    shard, _, shards = args.shard.partition('/')
+    config['shard'] = (int(shard), int(shards or 1))
+    if not 0 <= config['shard'][0] < config['shard'][1]:
+        print('The shard has to be given as i/n with 0 <= i < n', file=sys.stderr)
+        exit(-1)
+    config['coordinator'] = args.coordinator
+    config['batch_time'] = args.batch_time / 1000
+    config['ledger'] = str(args.ledger) if args.ledger is not None else config.get('ledger', str(Path.cwd()/'cracktool.ledger'))
+    config['potfile'] = str(args.potfile) if args.potfile is not None else config.get('potfile', str(Path.cwd()/'cracktool.pot'))
+
+    def mask_dictionary(mask: str) -> Dict:
+        charsets = {str(idx): getattr(args, f'charset{idx}') for idx in range(1, 5) if getattr(args, f'charset{idx}') is not None}
+        try:
+            length = len(parse_mask(mask, charsets))
+        except ValueError as error:
+            print(error, file=sys.stderr)
+            exit(-1)
+        increment = [args.increment_min, args.increment_max or length] if args.increment else None
+        return {'key': mask, 'mask': mask, 'charsets': charsets, 'increment': increment}
+
+    if args.mask is not None:
+        config['dict'] = mask_dictionary(args.mask)
+    elif args.markov is not None or args.markov_potfile:
+        lists = [next((d['path'] for d in config['dictionaries'] if d['key'] == name and 'path' in d), name) for name in args.markov or []]
+        potfiles = [config['potfile']] if args.markov_potfile and config['potfile'] else []
+        if not lists and not potfiles:
+            print('The Markov model needs a word list or the potfile to train on', file=sys.stderr)
+            exit(-1)
+        config['dict'] = {'key': 'markov', 'markov': {'lists': lists, 'potfiles': potfiles}, 'limit': args.markov_limit}
+    elif args.dict is not None:
         option = list(filter(lambda e: e['key'] == args.dict, config['dictionaries']))
         config['dict'] = config['dictionaries'][0] if not option else option[0]
     else:
         config['dict'] = config['dictionaries'][0]
 
+    # Follow each word of the dictionary or the mask by each word of another one
+    if args.combine is not None:
+        option = list(filter(lambda e: e['key'] == args.combine, config['dictionaries']))
+        if not option:
+            print(f'There is no dictionary {args.combine} to combine with', file=sys.stderr)
+            exit(-1)
+        right = option[0]
+    elif args.combine_mask is not None:
+        right = mask_dictionary(args.combine_mask)
+    if args.combine is not None or args.combine_mask is not None:
+        config['dict'] = {'key': f'{config["dict"]["key"]}+{right["key"]}', 'left': config['dict'], 'right': right}
+
     if args.selected_hash_sets or args.all_hash_sets:
         config['selected_hash_sets'] = [hg['key'] for hg in config['hash_sets']] if args.all_hash_sets \
             else [hg['key'] for hg in config['hash_sets'] if hg['key'] in args.selected_hash_sets]
-    else:
-        print('At least one hash set is required', sys.stderr)
+    elif args.resume is None:
+        print('At least one hash set is required', file=sys.stderr)
         exit(-1)
 
     #
@@ -95,10 +246,39 @@ if __name__ == '__main__':
         else:
             arg_set.append(arg)
     if arg_set: config['pipeline']['variators'].append(arg_set)
+    config['pipeline']['chunk_size'] = args.chunk_size
+    config['pipeline']['dedup'] = (args.dedup, args.dedup_error) if args.dedup else None
+    config['pipeline']['tiers'] = args.tiers
     config['pipeline']['hash_sources'] = \
         list(range(len(config['pipeline']['variators']) + 1)) if args.hash_sources is None \
             else [int(s) for s in args.hash_sources]
 
+    #
+    # Resume a job, the dictionary, the pipeline and the hash sets come from the checkpoint
+    #
+    if args.resume is not None and config['coordinator']:
+        # The coordinator keeps the progress of a coordinated job, a node has nothing of its own to resume
+        print('A coordinated job cannot be resumed from a checkpoint, restart the node without --resume', file=sys.stderr)
+        exit(-1)
+    config['resume'] = Checkpoint.load(args.resume) if args.resume is not None else None
+    if config['resume'] is not None:
+        config.update(config['resume']['config'])
+    checkpoint_path = args.checkpoint if args.checkpoint is not None else args.resume or Path.cwd()/'cracktool.checkpoint'
+    config['checkpoint'] = str(checkpoint_path)
+    config['checkpoint_interval'] = args.checkpoint_interval
+
+    # A node only goes through a part of the dictionary, so its jobs cannot be recorded as complete
+    # and the progress of a coordinated job is kept by the coordinator, the ledger only keeps track of dictionary files.
+    # The dedup filter skips a few fresh candidates by mistake, so a job run with it may not have tried every guess
+    if config['shard'] != (0, 1) or config['coordinator'] or 'path' not in config['dict'] or config['pipeline'].get('dedup'):
+        config['ledger'] = ''
+    if config['coordinator']:
+        config['checkpoint'] = ''
+        if config['pipeline'].get('tiers'):
+            # The coordinator hands the dictionary out once, not once per tier
+            print('A tiered pipeline cannot be coordinated between nodes', file=sys.stderr)
+            exit(-1)
+
     #
     # Configure logging
     #
@@ -0,0 +1,44 @@
+from collections import Counter
+from threading import Lock
+from typing import List
+
+import pytest
+
+from CrackerCore.Hasher import Hasher
+
+
+class RecordingHasher(Hasher):
+    # A hasher that notes the size of every batch it checks and every guess in a counter it may share
+    def __init__(self, checked: Counter, lock: Lock) -> None:
+        super().__init__()
+        self.batches: List[int] = []
+        self.__checked = checked
+        self.__lock = lock
+
+    def check(self, words) -> None:
+        words = list(words)
+        with self.__lock:
+            self.batches.append(len(words))
+            self.__checked.update(words)
+        super().check(words)
+
+    def check_suffixed(self, prefix: bytes, suffixes) -> None:
+        with self.__lock:
+            self.batches.append(len(suffixes))
+            self.__checked.update(prefix + suffix for suffix in suffixes)
+        super().check_suffixed(prefix, suffixes)
+
+
+class Recording:
+    # Makes recording hashers, the guesses checked by all of them end up in the same counter
+    def __init__(self) -> None:
+        self.checked: Counter = Counter()
+        self.__lock = Lock()
+
+    def hasher(self) -> RecordingHasher:
+        return RecordingHasher(self.checked, self.__lock)
+
+
+@pytest.fixture
+def recording() -> Recording:
+    return Recording()
@@ -0,0 +1,20 @@
+
+from CrackerCore.sources.combinator import CombinatorWordSource
+from CrackerCore.sources.mask import MaskWordSource
+
+
+def test_push_is_bounded_with_a_mask_on_the_right(recording) -> None:
+    # Each of the words is followed by 95^6 mask words, a push still only takes what it is asked for
+    word_source = CombinatorWordSource([b'alpha', b'beta'], MaskWordSource('?a' * 6).words())
+    hasher = recording.hasher()
+    word_source.use_hasher(hasher)
+    assert [word_source.push(count) for count in (100, 1000, 5000)] == [100, 1000, 5000]
+    assert hasher.batches == [100, 1000, 5000]
+
+
+def test_keyspace_beyond_sys_maxsize(recording) -> None:
+    # 95^6 by 95^6 guesses do not fit len(), the total is still exact
+    word_source = CombinatorWordSource(MaskWordSource('?a' * 6).words(), MaskWordSource('?a' * 6).words())
+    assert word_source.length == 95 ** 12
+    word_source.use_hasher(recording.hasher())
+    assert word_source.push(100) == 100
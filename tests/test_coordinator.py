@@ -0,0 +1,54 @@
+import hashlib
+from pathlib import Path
+from threading import Thread
+
+from CrackerCore.Coordinator import Coordinator, RemoteClaimer
+from CrackerCore.HashGroup import HashGroup
+from CrackerCore.WordSource import WordSource
+from CrackerCore.WorkerPool import WorkerPool
+
+
+def run_node(address, dictionary: Path, hashes: Path, recording) -> None:
+    # A node with a couple of worker threads that claims the dictionary from the coordinator
+    remote = RemoteClaimer(address)
+    hasher = recording.hasher()
+    group = HashGroup('Hashes', hashes)
+    group.notify_on_match(remote.report)
+    hasher.add_group(group)
+
+    word_source = WordSource(dictionary)
+    assert word_source.use_claimer(remote.attach)
+    word_source.use_hasher(hasher)
+    worker_pool = WorkerPool(2, word_source, hasher, batch_time=0.001)
+    worker_pool.start()
+    worker_pool.join()
+
+
+def test_nodes_share_the_dictionary(tmp_path: Path, recording) -> None:
+    words = [f'word{idx:05d}'.encode('utf8') for idx in range(5000)]
+    dictionary = tmp_path / 'dictionary.txt'
+    dictionary.write_bytes(b'\n'.join(words) + b'\n')
+    targets = words[7::997]
+    hashes = tmp_path / 'hashes.txt'
+    hashes.write_text(''.join(hashlib.sha1(word).hexdigest() + '\n' for word in targets))
+    output = tmp_path / 'matches.txt'
+
+    coordinator = Coordinator(('127.0.0.1', 0), output)
+    server = Thread(target=coordinator.run, daemon=True)
+    server.start()
+
+    nodes = [Thread(target=run_node, args=(coordinator.address, dictionary, hashes, recording)) for _ in range(3)]
+    for node in nodes:
+        node.start()
+    for node in nodes:
+        node.join(timeout=60)
+    server.join(timeout=10)
+    assert not server.is_alive()
+
+    # Every word was claimed and checked by exactly one node
+    assert set(recording.checked) == set(words)
+    assert set(recording.checked.values()) == {1}
+
+    # The matches of all nodes reached the coordinator
+    lines = output.read_text().splitlines()
+    assert sorted(line.split('\t')[1] for line in lines) == sorted(word.decode('utf8') for word in targets)
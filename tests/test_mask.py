@@ -0,0 +1,43 @@
+from typing import List
+
+import pytest
+
+from CrackerCore.sources.mask import MaskWordSource, parse_mask
+from CrackerCore.utilities.exceptions import WordSourceEmpty
+
+
+def test_push_is_bounded_on_a_huge_keyspace(recording) -> None:
+    # 95^8 candidates are claimed in grains of over a billion, a push still only takes what it is asked for
+    word_source = MaskWordSource('?a' * 8)
+    hasher = recording.hasher()
+    word_source.use_hasher(hasher)
+    for count in (100, 1000, 5000):
+        assert word_source.push(count) == count
+    assert hasher.batches == [100, 1000, 5000]
+    assert word_source.progress == 6100
+
+
+def test_keyspace_beyond_sys_maxsize(recording) -> None:
+    # 95^10 candidates do not fit len(), the table still reports its size
+    word_source = MaskWordSource('?a' * 10)
+    assert word_source.length == 95 ** 10
+    word_source.use_hasher(recording.hasher())
+    assert word_source.push(100) == 100
+    assert word_source.words()[95 ** 10 - 1] == b'~' * 10
+
+
+def test_pushes_continue_where_the_last_one_stopped(recording) -> None:
+    word_source = MaskWordSource('?d?d?d')
+    words: List[bytes] = []
+    word_source.use_hasher(recording.hasher())
+    word_source.use_variator(type('Collect', (), {'endpoint': lambda self, batch: words.extend(batch)})())
+    with pytest.raises(WordSourceEmpty):
+        while True:
+            assert word_source.push(70) <= 70
+    assert sorted(words) == [b'%03d' % value for value in range(1000)]
+
+
+def test_non_ascii_literals_are_single_symbols() -> None:
+    assert list(MaskWordSource('pä?d').words()) == [f'pä{digit}'.encode('utf8') for digit in range(10)]
+    assert parse_mask('?1', {'1': 'äöä'}) == [('ä'.encode('utf8'), 'ö'.encode('utf8'))]
+    assert list(MaskWordSource('?1x', {'1': 'ä?d'}).words())[:2] == ['äx'.encode('utf8'), '0x'.encode('utf8')]